@@ -7,10 +7,19 @@ Configuration can be overridden via environment variables:
     STARTUP_WAIT: Time to wait for terminal startup (seconds)
     COMMAND_WAIT: Time to wait after sending commands (seconds)
     STABILITY_TIME: Time screen must be stable before screenshot (seconds)
+    SETTLE_TIME: Quiet period that ends an adaptive post-input wait (seconds)
     MAX_WAIT: Maximum time to wait for screen stability (seconds)
     COLOR_TOLERANCE: RGB tolerance for color matching
     MIN_TEXT_PIXELS: Minimum pixels to consider text present
     OCR_THRESHOLD: OCR fuzzy match threshold (0.0-1.0)
+    SCREEN_CHANGE_PIXELS: Changed pixels that count as a redraw
+        (replaces SCREEN_CHANGE_THRESHOLD, which is still read and divided by 250)
+    VERBOSE_OCR: Also OCR passing screenshots to log expected text (1 = enabled)
+    POST_MESSAGE_INPUT: Post typed text to the window instead of SendInput (1 = enabled; forced on under pytest-xdist)
+    ANALYSIS_DOWNSAMPLE: Pixel step for text-presence/occupancy checks (1 = full resolution)
+    SAVE_SCREENSHOTS: Save every screenshot, not just those from failing tests (1 = enabled)
+    DEBUG_SCREENSHOTS: Save full-resolution PNGs instead of downsized JPEGs (1 = enabled)
+    HQ_SCREENSHOTS: Downscale saved screenshots with LANCZOS instead of BILINEAR (1 = enabled)
 """
 
 import os
@@ -45,19 +54,50 @@ class TestConfig:
     CLEAR_WAIT: float = float(os.environ.get('CLEAR_WAIT', '0.5'))
     RENDER_WAIT: float = float(os.environ.get('RENDER_WAIT', '0.5'))
     STABILITY_TIME: float = float(os.environ.get('STABILITY_TIME', '0.3'))
+    SETTLE_TIME: float = float(os.environ.get('SETTLE_TIME', '0.3'))
     MAX_WAIT: float = float(os.environ.get('MAX_WAIT', '5.0'))
     POLL_INTERVAL: float = float(os.environ.get('POLL_INTERVAL', '0.1'))
     KEY_DELAY: float = float(os.environ.get('KEY_DELAY', '0.05'))
 
+    # Input - post WM_CHAR to the terminal window (no focus needed) instead of SendInput
+    POST_MESSAGE_INPUT: bool = os.environ.get('POST_MESSAGE_INPUT', '0') == '1'
+
     # Thresholds
     COLOR_TOLERANCE: int = int(os.environ.get('COLOR_TOLERANCE', '50'))
     MIN_TEXT_PIXELS: int = int(os.environ.get('MIN_TEXT_PIXELS', '100'))
     OCR_THRESHOLD: float = float(os.environ.get('OCR_THRESHOLD', '0.8'))
-    SCREEN_CHANGE_THRESHOLD: int = int(os.environ.get('SCREEN_CHANGE_THRESHOLD', '1000'))
+    VERBOSE_OCR: bool = os.environ.get('VERBOSE_OCR', '0') == '1'
+    # Falls back to the old SCREEN_CHANGE_THRESHOLD (an abs-diff sum, ~250 per changed pixel)
+    SCREEN_CHANGE_PIXELS: int = int(os.environ.get(
+        'SCREEN_CHANGE_PIXELS',
+        max(1, round(int(os.environ.get('SCREEN_CHANGE_THRESHOLD', '1000')) / 250))
+    ))
+
+    # Analysis - occupancy checks sample every Nth pixel; thresholds scale by 1/N^2
+    ANALYSIS_DOWNSAMPLE: int = int(os.environ.get('ANALYSIS_DOWNSAMPLE', '2'))
 
     # Screenshot settings
     MAX_SCREENSHOT_SIZE: int = int(os.environ.get('MAX_SCREENSHOT_SIZE', '1200'))
     JPEG_QUALITY: int = int(os.environ.get('JPEG_QUALITY', '85'))
+    SAVE_SCREENSHOTS: bool = os.environ.get('SAVE_SCREENSHOTS', '0') == '1'
+    SCREENSHOT_HISTORY: int = int(os.environ.get('SCREENSHOT_HISTORY', '8'))
+    DEBUG_SCREENSHOTS: bool = os.environ.get('DEBUG_SCREENSHOTS', '0') == '1'
+    HQ_SCREENSHOTS: bool = os.environ.get('HQ_SCREENSHOTS', '0') == '1'
+
+    # Parallel runs - set by pytest-xdist; each worker drives its own terminal
+    WORKER_ID: str = os.environ.get('PYTEST_XDIST_WORKER', '')
+    WORKER_COUNT: int = int(os.environ.get('PYTEST_XDIST_WORKER_COUNT', '1'))
+
+    @classmethod
+    def worker_index(cls) -> int:
+        """Return this worker's index (0 when not running under xdist)."""
+        digits = ''.join(c for c in cls.WORKER_ID if c.isdigit())
+        return int(digits) if digits else 0
+
+    @classmethod
+    def worker_suffix(cls) -> str:
+        """Return a file-name suffix unique to this worker ('' when not running under xdist)."""
+        return f"_{cls.WORKER_ID}" if cls.WORKER_ID else ""
 
     @classmethod
     def ensure_dirs(cls) -> None:
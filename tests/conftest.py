@@ -11,7 +11,6 @@ This module provides:
 
 import pytest
 import subprocess
-import time
 import os
 import sys
 from pathlib import Path
@@ -77,6 +76,24 @@ def pytest_addoption(parser):
         default=0.1,
         help="Visual regression threshold percentage (default: 0.1)"
     )
+    parser.addoption(
+        "--hq-screenshots",
+        action="store_true",
+        default=False,
+        help="Downscale saved screenshots with LANCZOS instead of BILINEAR"
+    )
+    parser.addoption(
+        "--verbose-ocr",
+        action="store_true",
+        default=False,
+        help="OCR passing screenshots to log expected text (same as VERBOSE_OCR=1)"
+    )
+    parser.addoption(
+        "--keep-original",
+        action="store_true",
+        default=False,
+        help="Save full-resolution PNG screenshots (same as DEBUG_SCREENSHOTS=1)"
+    )
 
 
 def pytest_configure(config):
@@ -102,12 +119,29 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "visual: marks visual regression tests"
     )
+    config.addinivalue_line(
+        "markers", "serial: marks tests that use the clipboard, mouse or global "
+                   "keyboard state (kept on one xdist worker)"
+    )
 
     # Override terminal path if provided
     terminal_exe = config.getoption("--terminal-exe")
     if terminal_exe:
         TestConfig.TERMINAL_EXE = terminal_exe
 
+    if config.getoption("--hq-screenshots"):
+        TestConfig.HQ_SCREENSHOTS = True
+    if config.getoption("--keep-original"):
+        TestConfig.DEBUG_SCREENSHOTS = True
+    if config.getoption("--verbose-ocr"):
+        TestConfig.VERBOSE_OCR = True
+
+    # Under xdist, SendInput reaches whichever worker's terminal has focus,
+    # so type by posting messages to each worker's own window. Only the
+    # serial group (one worker) still injects global input.
+    if TestConfig.WORKER_COUNT > 1:
+        TestConfig.POST_MESSAGE_INPUT = True
+
 
 @pytest.fixture(scope="session")
 def terminal_session() -> Generator:
@@ -121,7 +155,8 @@ def terminal_session() -> Generator:
     tester = TerminalTester()
 
     try:
-        tester.start_terminal()
+        if tester.start_terminal():
+            tester.warm_up()
         yield tester
     finally:
         tester.cleanup()
@@ -139,14 +174,15 @@ def terminal_isolated() -> Generator:
     tester = TerminalTester()
 
     try:
-        tester.start_terminal()
+        if tester.start_terminal():
+            tester.warm_up()
         yield tester
     finally:
         tester.cleanup()
 
 
 @pytest.fixture
-def terminal(request, terminal_session, terminal_isolated) -> Generator:
+def terminal(request) -> Generator:
     """
     Smart terminal fixture that chooses isolation level based on command-line options.
 
@@ -160,17 +196,15 @@ def terminal(request, terminal_session, terminal_isolated) -> Generator:
         --isolated: Use fresh terminal per test (slower but isolated)
         --fast: Use shared terminal session (faster but tests may interfere)
         (default): Use shared terminal session
+
+    Only the selected fixture is instantiated, so the default mode starts a
+    single terminal for the whole session. The screen is cleared before
+    each test by auto_clear_screen.
     """
     if request.config.getoption("--isolated"):
-        # Clear screen before each test for partial isolation
-        terminal_isolated.send_keys("cls\n")
-        time.sleep(0.5)
-        yield terminal_isolated
+        yield request.getfixturevalue("terminal_isolated")
     else:
-        # Clear screen before each test for consistency
-        terminal_session.send_keys("cls\n")
-        time.sleep(0.5)
-        yield terminal_session
+        yield request.getfixturevalue("terminal_session")
 
 
 @pytest.fixture
@@ -194,28 +228,44 @@ def pytest_collection_modifyitems(config, items):
         ocr_available = False
 
     skip_ocr = pytest.mark.skip(reason="winocr not installed")
+    # Under `pytest -n N --dist loadgroup`, run all serial tests on one worker
+    serial_group = pytest.mark.xdist_group("serial")
 
     for item in items:
         if "ocr" in item.keywords and not ocr_available:
             item.add_marker(skip_ocr)
+        if "serial" in item.keywords:
+            item.add_marker(serial_group)
 
 
 def pytest_runtest_makereport(item, call):
-    """Capture screenshots on test failure."""
-    if call.when == "call" and call.excinfo is not None:
-        # Test failed - try to capture a screenshot for debugging
-        try:
-            # Get terminal fixture if available
-            terminal = item.funcargs.get("terminal") or \
-                       item.funcargs.get("terminal_session") or \
-                       item.funcargs.get("terminal_isolated")
-
-            if terminal and terminal.hwnd:
-                failure_name = f"FAILURE_{item.name}"
-                terminal.wait_and_screenshot(failure_name, wait_stable=False)
-                print(f"  Failure screenshot saved: {failure_name}")
-        except Exception as e:
-            print(f"  Could not capture failure screenshot: {e}")
+    """Save screenshots on test failure, discard them on success."""
+    if call.when != "call":
+        return
+
+    # Get terminal fixture if available
+    terminal = item.funcargs.get("terminal") or \
+               item.funcargs.get("terminal_session") or \
+               item.funcargs.get("terminal_isolated")
+    if not terminal:
+        return
+
+    # Skips and xfails raised inside the test are not failures
+    if call.excinfo is None or call.excinfo.errisinstance(
+            (pytest.skip.Exception, pytest.xfail.Exception)):
+        terminal.discard_recent_screenshots()
+        return
+
+    # Test failed - dump this test's captures plus the current screen
+    try:
+        for path in terminal.save_recent_screenshots():
+            print(f"  Screenshot saved: {path.name}")
+        if terminal.hwnd:
+            failure_name = f"FAILURE_{item.name}"
+            terminal.wait_and_screenshot(failure_name, wait_stable=False, save=True)
+            print(f"  Failure screenshot saved: {failure_name}")
+    except Exception as e:
+        print(f"  Could not capture failure screenshot: {e}")
 
 
 # ============================================================================
@@ -223,20 +273,21 @@ def pytest_runtest_makereport(item, call):
 # ============================================================================
 
 @pytest.fixture(autouse=True)
-def auto_clear_screen(request, terminal_session):
+def auto_clear_screen(request):
     """Auto-clear screen before each test (can be disabled with @pytest.mark.no_clear)."""
     if 'no_clear' not in request.keywords:
-        # Only clear if we have a terminal fixture in use
-        if 'terminal' in request.fixturenames or 'terminal_session' in request.fixturenames:
-            terminal_session.send_keys("cls\n")
-            time.sleep(TestConfig.CLEAR_WAIT)
+        # Only clear if we have a terminal fixture in use (and only then start one),
+        # clearing whichever terminal the test actually gets
+        for name in ('terminal', 'terminal_session', 'terminal_isolated'):
+            if name in request.fixturenames:
+                request.getfixturevalue(name).clear_screen()
+                break
 
 
 @pytest.fixture
 def clear_screen(terminal):
     """Explicit fixture that clears the terminal screen."""
-    terminal.send_keys("cls\n")
-    time.sleep(TestConfig.CLEAR_WAIT)
+    terminal.clear_screen()
     return terminal
 
 
@@ -278,11 +329,12 @@ def ocr_verifier() -> OCRVerifier:
 # ============================================================================
 
 @pytest.fixture(scope="session")
-def visual_regression(request) -> VisualRegressionTester:
+def visual_regression(request) -> Generator:
     """
     Session-scoped visual regression tester.
 
-    Provides methods to compare screenshots against baselines.
+    Provides methods to compare screenshots against baselines. Baseline
+    metadata is written once at the end of the session.
 
     Usage:
         def test_rendering(terminal, visual_regression):
@@ -291,7 +343,9 @@ def visual_regression(request) -> VisualRegressionTester:
             assert result, result.message
     """
     threshold = request.config.getoption("--visual-threshold")
-    return VisualRegressionTester(threshold=threshold)
+    tester = VisualRegressionTester(threshold=threshold)
+    yield tester
+    tester.flush_metadata()
 
 
 @pytest.fixture
@@ -8,15 +8,20 @@ Contains extracted components for:
 - OCR verification (text matching)
 """
 
-from typing import Dict, List, Tuple, Optional, Callable
+from typing import Dict, List, Tuple, Optional, Callable, Union
 from PIL import Image, ImageEnhance
 import numpy as np
 import asyncio
 import ctypes
+import functools
+import io
+import math
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from ctypes import wintypes
 import win32gui
 import win32con
-import win32api
 import pywintypes
 import time
 
@@ -25,16 +30,21 @@ from pathlib import Path
 from PIL import ImageGrab
 
 from config import TestConfig, VGAColors
+from image_utils import image_digest
 
 __all__ = [
     'ScreenAnalyzer',
     'KeyboardController',
     'OCRVerifier',
     'WindowHelper',
+    'ScreenCapture',
     'TerminalTester',
     'OCR_AVAILABLE',
 ]
 
+# Screenshots may be passed to analyzers as PIL Images or as RGB(A) arrays
+Screenshot = Union[Image.Image, np.ndarray]
+
 # OCR imports
 try:
     from winocr import recognize_pil
@@ -65,7 +75,127 @@ class POINT(ctypes.Structure):
     ]
 
 
+class BITMAPINFOHEADER(ctypes.Structure):
+    """Windows BITMAPINFOHEADER structure."""
+    _fields_ = [
+        ('biSize', wintypes.DWORD),
+        ('biWidth', ctypes.c_long),
+        ('biHeight', ctypes.c_long),
+        ('biPlanes', wintypes.WORD),
+        ('biBitCount', wintypes.WORD),
+        ('biCompression', wintypes.DWORD),
+        ('biSizeImage', wintypes.DWORD),
+        ('biXPelsPerMeter', ctypes.c_long),
+        ('biYPelsPerMeter', ctypes.c_long),
+        ('biClrUsed', wintypes.DWORD),
+        ('biClrImportant', wintypes.DWORD)
+    ]
+
+
+class BITMAPINFO(ctypes.Structure):
+    """Windows BITMAPINFO structure (header plus color masks)."""
+    _fields_ = [
+        ('bmiHeader', BITMAPINFOHEADER),
+        ('bmiColors', wintypes.DWORD * 3)
+    ]
+
+
+ULONG_PTR = ctypes.c_size_t
+
+
+class KEYBDINPUT(ctypes.Structure):
+    """Windows KEYBDINPUT structure."""
+    _fields_ = [
+        ('wVk', wintypes.WORD),
+        ('wScan', wintypes.WORD),
+        ('dwFlags', wintypes.DWORD),
+        ('time', wintypes.DWORD),
+        ('dwExtraInfo', ULONG_PTR)
+    ]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    """Windows MOUSEINPUT structure."""
+    _fields_ = [
+        ('dx', ctypes.c_long),
+        ('dy', ctypes.c_long),
+        ('mouseData', wintypes.DWORD),
+        ('dwFlags', wintypes.DWORD),
+        ('time', wintypes.DWORD),
+        ('dwExtraInfo', ULONG_PTR)
+    ]
+
+
+class HARDWAREINPUT(ctypes.Structure):
+    """Windows HARDWAREINPUT structure."""
+    _fields_ = [
+        ('uMsg', wintypes.DWORD),
+        ('wParamL', wintypes.WORD),
+        ('wParamH', wintypes.WORD)
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [
+        ('mi', MOUSEINPUT),
+        ('ki', KEYBDINPUT),
+        ('hi', HARDWAREINPUT)
+    ]
+
+
+class INPUT(ctypes.Structure):
+    """Windows INPUT structure (for SendInput)."""
+    _anonymous_ = ('u',)
+    _fields_ = [
+        ('type', wintypes.DWORD),
+        ('u', _INPUTUNION)
+    ]
+
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+
 user32 = ctypes.windll.user32
+gdi32 = ctypes.windll.gdi32
+
+user32.SendInput.argtypes = [wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int]
+user32.SendInput.restype = wintypes.UINT
+
+# Input helpers called per key/click - cheaper than going through pywin32
+user32.SetCursorPos.argtypes = [ctypes.c_int, ctypes.c_int]
+user32.SetCursorPos.restype = wintypes.BOOL
+user32.mouse_event.argtypes = [
+    wintypes.DWORD, wintypes.DWORD, wintypes.DWORD, wintypes.DWORD, ULONG_PTR
+]
+user32.mouse_event.restype = None
+user32.GetSystemMetrics.argtypes = [ctypes.c_int]
+user32.GetSystemMetrics.restype = ctypes.c_int
+
+# GDI signatures - handles must not be truncated to 32-bit ints on x64
+user32.GetDC.argtypes = [wintypes.HWND]
+user32.GetDC.restype = wintypes.HDC
+user32.ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+gdi32.CreateCompatibleDC.argtypes = [wintypes.HDC]
+gdi32.CreateCompatibleDC.restype = wintypes.HDC
+gdi32.SelectObject.argtypes = [wintypes.HDC, wintypes.HGDIOBJ]
+gdi32.SelectObject.restype = wintypes.HGDIOBJ
+gdi32.DeleteObject.argtypes = [wintypes.HGDIOBJ]
+gdi32.DeleteDC.argtypes = [wintypes.HDC]
+gdi32.BitBlt.argtypes = [
+    wintypes.HDC, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+    wintypes.HDC, ctypes.c_int, ctypes.c_int, wintypes.DWORD
+]
+gdi32.CreateDIBSection.argtypes = [
+    wintypes.HDC, ctypes.POINTER(BITMAPINFO), wintypes.UINT,
+    ctypes.POINTER(ctypes.c_void_p), wintypes.HANDLE, wintypes.DWORD
+]
+gdi32.CreateDIBSection.restype = wintypes.HBITMAP
+
+SRCCOPY = 0x00CC0020
+CAPTUREBLT = 0x40000000
+BI_RGB = 0
+DIB_RGB_COLORS = 0
 
 # Enable DPI awareness for accurate screen coordinates
 try:
@@ -90,18 +220,114 @@ except (OSError, AttributeError):
 class ScreenAnalyzer:
     """Analyzes screenshots for colors and text presence."""
 
-    def __init__(self, color_tolerance: Optional[int] = None):
+    # Rows processed per slab: masks and lookup codes for one slab of a
+    # typical capture stay small enough to be reused from cache instead of
+    # allocating full-screen temporaries.
+    _SLAB_ROWS = 64
+
+    def __init__(self, color_tolerance: Optional[int] = None, downsample: Optional[int] = None):
         """
         Initialize screen analyzer.
 
         Args:
             color_tolerance: Tolerance for color matching (uses config default if None)
+            downsample: Subsampling step for occupancy checks (uses config default if None)
         """
         self.color_tolerance = color_tolerance or TestConfig.COLOR_TOLERANCE
+        self.downsample = max(1, downsample or TestConfig.ANALYSIS_DOWNSAMPLE)
+
+    def _downsample(self, screenshot: Screenshot) -> np.ndarray:
+        """
+        Subsample an image for scale-invariant occupancy checks.
+
+        Pixel thresholds applied to the result must be divided by N*N.
+        """
+        return self._sample(screenshot, self.downsample)
+
+    @staticmethod
+    def _sample(screenshot: Screenshot, n: int) -> np.ndarray:
+        """
+        Take every Nth pixel of an image in both directions.
+
+        Arrays are sliced (a view, no copy). PIL images are point-sampled by
+        Pillow before conversion, so only the sampled pixels are ever copied
+        into an array.
+        """
+        if isinstance(screenshot, Image.Image):
+            if n == 1:
+                return np.asarray(screenshot)
+            width, height = screenshot.size
+            size = (-(-width // n), -(-height // n))
+            return np.asarray(screenshot.resize(size, Image.Resampling.NEAREST))
+        if n == 1:
+            return screenshot
+        return screenshot[::n, ::n]
+
+    @staticmethod
+    def _to_array(screenshot: Screenshot) -> np.ndarray:
+        """
+        Get the pixel array for a screenshot.
+
+        Arrays are returned as-is, so callers that analyze the same frame
+        several times can convert once and pass the array around.
+        """
+        return np.asarray(screenshot)
+
+    @staticmethod
+    def _at_least(mask: np.ndarray, n: int, chunk_rows: int = _SLAB_ROWS) -> bool:
+        """
+        Check whether more than n pixels of a boolean mask are set.
+
+        Counts the mask in slabs of rows and returns as soon as the running
+        total exceeds n, so passing checks rarely touch the whole image.
+
+        Args:
+            mask: 2D boolean (or 0/nonzero) mask
+            n: Pixel count that must be exceeded
+            chunk_rows: Number of rows counted per slab
+
+        Returns:
+            True if the mask has more than n set pixels
+        """
+        total = 0
+        for row in range(0, mask.shape[0], chunk_rows):
+            total += np.count_nonzero(mask[row:row + chunk_rows])
+            if total > n:
+                return True
+        return False
+
+    @staticmethod
+    def _filter_at_least(
+        img_array: np.ndarray,
+        pixel_filter: Callable[[np.ndarray], np.ndarray],
+        n: int,
+        chunk_rows: int = _SLAB_ROWS
+    ) -> bool:
+        """
+        Check whether more than n pixels pass a filter, filtering slab by slab.
+
+        Unlike _at_least, the mask itself is built one slab at a time, so an
+        early exit also skips filtering the rest of the image.
+
+        Args:
+            img_array: RGB(A) image array
+            pixel_filter: Function that takes an image slab and returns a boolean mask
+            n: Pixel count that must be exceeded
+            chunk_rows: Number of rows filtered per slab
+
+        Returns:
+            True if more than n pixels pass the filter
+        """
+        total = 0
+        for row in range(0, img_array.shape[0], chunk_rows):
+            total += np.count_nonzero(pixel_filter(img_array[row:row + chunk_rows]))
+            if total > n:
+                return True
+        return False
 
     def analyze_colors(
         self,
-        screenshot: Image.Image,
+        screenshot: Screenshot,
         expected_colors: Dict[str, Tuple[int, int, int]],
         min_pixels: int = 50
     ) -> Dict[str, bool]:
@@ -109,65 +335,94 @@ class ScreenAnalyzer:
         Analyze screenshot for expected colors.
 
         Args:
-            screenshot: PIL Image to analyze
+            screenshot: PIL Image or RGB array to analyze
             expected_colors: Dict mapping color name to RGB tuple
             min_pixels: Minimum pixels to consider color present
 
         Returns:
             Dict mapping color name to bool (found or not)
         """
-        img_array = np.array(screenshot)
+        img_array = self._to_array(screenshot)
+        tolerance = self.color_tolerance
+        names = list(expected_colors)
         results = {}
 
-        for color_name, rgb in expected_colors.items():
-            mask = np.all(
-                np.abs(img_array[:, :, :3] - rgb) < self.color_tolerance,
-                axis=2
-            )
-            pixel_count = np.sum(mask)
-            results[color_name] = pixel_count > min_pixels
+        # |channel - value| < tolerance is the range [value - tolerance + 1, value + tolerance)
+        for start in range(0, len(names), 8):
+            group = names[start:start + 8]
+            ranges = [
+                tuple(bound for value in expected_colors[name][:3]
+                      for bound in (int(value) - tolerance + 1, int(value) + tolerance))
+                for name in group
+            ]
+            counts = self._count_ranges(img_array, ranges, stop_above=min_pixels)
+            results.update((name, count > min_pixels) for name, count in zip(group, counts))
 
         return results
 
     def analyze_text_presence(
         self,
-        screenshot: Image.Image,
+        screenshot: Screenshot,
         min_pixels: Optional[int] = None
     ) -> bool:
         """
         Check if text is present (non-black pixels).
 
         Args:
-            screenshot: PIL Image to analyze
+            screenshot: PIL Image or RGB array to analyze
             min_pixels: Minimum non-black pixels to consider text present
 
         Returns:
             True if text is present
         """
         min_pixels = min_pixels or TestConfig.MIN_TEXT_PIXELS
-        img_array = np.array(screenshot)
-        non_black = np.any(img_array[:, :, :3] > 30, axis=2)
-        text_pixel_count = np.sum(non_black)
-        return text_pixel_count > min_pixels
+        img_array = self._downsample(screenshot)
+        return self._filter_at_least(
+            img_array,
+            self._non_black_filter,
+            min_pixels // (self.downsample ** 2)
+        )
 
     def find_color_pixels(
         self,
-        screenshot: Image.Image,
+        screenshot: Screenshot,
         color_filter: Callable[[np.ndarray], np.ndarray]
     ) -> int:
         """
         Count pixels matching a custom color filter.
 
         Args:
-            screenshot: PIL Image to analyze
+            screenshot: PIL Image or RGB array to analyze
             color_filter: Function that takes image array and returns boolean mask
 
         Returns:
             Number of matching pixels
         """
-        img_array = np.array(screenshot)
-        mask = color_filter(img_array)
-        return np.sum(mask)
+        img_array = self._to_array(screenshot)
+        total = 0
+        for row in range(0, img_array.shape[0], self._SLAB_ROWS):
+            total += np.count_nonzero(color_filter(img_array[row:row + self._SLAB_ROWS]))
+        return total
+
+    def has_color_pixels(
+        self,
+        screenshot: Screenshot,
+        color_filter: Callable[[np.ndarray], np.ndarray],
+        min_pixels: int
+    ) -> bool:
+        """
+        Check whether more than min_pixels pixels match a custom color filter.
+
+        Args:
+            screenshot: PIL Image or RGB array to analyze
+            color_filter: Function that takes image array and returns boolean mask
+            min_pixels: Pixel count that must be exceeded
+
+        Returns:
+            True if enough pixels match
+        """
+        img_array = self._to_array(screenshot)
+        return self._filter_at_least(img_array, color_filter, min_pixels)
 
     # Color filter definitions: (R_min, R_max, G_min, G_max, B_min, B_max)
     _COLOR_FILTERS = {
@@ -179,71 +434,227 @@ class ScreenAnalyzer:
         'yellow':  (150, 256, 150, 256, 0, 100),
     }
 
-    def _make_color_filter(self, r_min, r_max, g_min, g_max, b_min, b_max):
-        """Create a color filter lambda for given RGB ranges."""
-        return lambda img: (
-            (img[:, :, 0] >= r_min) & (img[:, :, 0] < r_max) &
-            (img[:, :, 1] >= g_min) & (img[:, :, 1] < g_max) &
-            (img[:, :, 2] >= b_min) & (img[:, :, 2] < b_max)
-        )
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _make_color_filter(r_min, r_max, g_min, g_max, b_min, b_max):
+        """
+        Create a color filter for given RGB ranges.
 
-    def find_colored_pixels(self, screenshot: Image.Image, color: str) -> int:
+        Each channel range becomes a 256-entry lookup table, so the filter is
+        three table gathers and two in-place ANDs instead of six comparisons
+        that each allocate a full-size boolean array. Filters are cached per
+        set of bounds, so the tables are built once per color.
+        """
+        values = np.arange(256)
+        luts = np.stack([
+            (values >= r_min) & (values < r_max),
+            (values >= g_min) & (values < g_max),
+            (values >= b_min) & (values < b_max),
+        ])
+
+        def color_filter(img: np.ndarray) -> np.ndarray:
+            mask = luts[0][img[:, :, 0]]
+            mask &= luts[1][img[:, :, 1]]
+            mask &= luts[2][img[:, :, 2]]
+            return mask
+
+        return color_filter
+
+    def find_colored_pixels(self, screenshot: Screenshot, color: str) -> int:
         """Count pixels of a specific color (red, green, blue, cyan, magenta, yellow)."""
         if color not in self._COLOR_FILTERS:
             raise ValueError(f"Unknown color: {color}. Use: {list(self._COLOR_FILTERS.keys())}")
         return self.find_color_pixels(screenshot, self._make_color_filter(*self._COLOR_FILTERS[color]))
 
-    def find_red_pixels(self, screenshot: Image.Image) -> int:
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _range_luts(ranges: Tuple[Tuple[int, int, int, int, int, int], ...]) -> np.ndarray:
+        """
+        Build per-channel lookup tables for up to 8 RGB ranges.
+
+        Entry [channel, value] has bit i set when that channel value lies in
+        ranges[i] (given as R_min, R_max, G_min, G_max, B_min, B_max with
+        exclusive maxima), so AND-ing the three lookups classifies a pixel
+        against every range at once.
+        """
+        luts = np.zeros((3, 256), dtype=np.uint8)
+        values = np.arange(256)
+        for bit, (r_min, r_max, g_min, g_max, b_min, b_max) in enumerate(ranges):
+            for channel, (lo, hi) in enumerate(((r_min, r_max), (g_min, g_max), (b_min, b_max))):
+                luts[channel, (values >= lo) & (values < hi)] |= 1 << bit
+        return luts
+
+    def _count_ranges(
+        self,
+        img_array: np.ndarray,
+        ranges: List[Tuple[int, int, int, int, int, int]],
+        stop_above: Optional[int] = None
+    ) -> List[int]:
+        """
+        Count pixels inside each of up to 8 RGB ranges in one slab-wise pass.
+
+        Args:
+            img_array: RGB(A) image array
+            ranges: (R_min, R_max, G_min, G_max, B_min, B_max) per range
+            stop_above: If given, stop early once every count exceeds it
+
+        Returns:
+            Pixel count per range (partial counts if stopped early)
+        """
+        luts = self._range_luts(tuple(ranges))
+        histogram = np.zeros(1 << len(ranges), dtype=np.int64)
+        bins = np.arange(histogram.size)
+        bit_masks = [(bins & (1 << bit)) != 0 for bit in range(len(ranges))]
+
+        for row in range(0, img_array.shape[0], self._SLAB_ROWS):
+            slab = img_array[row:row + self._SLAB_ROWS]
+            codes = luts[0][slab[:, :, 0]]
+            codes &= luts[1][slab[:, :, 1]]
+            codes &= luts[2][slab[:, :, 2]]
+            histogram += np.bincount(codes.ravel(), minlength=histogram.size)
+            if stop_above is not None and all(
+                    histogram[mask].sum() > stop_above for mask in bit_masks):
+                break
+
+        return [int(histogram[mask].sum()) for mask in bit_masks]
+
+    def count_colors(self, screenshot: Screenshot, colors: List[str]) -> Dict[str, int]:
+        """
+        Count pixels of several named colors in a single pass over the image.
+
+        Args:
+            screenshot: PIL Image or RGB array to analyze
+            colors: Up to 8 color names (red, green, blue, cyan, magenta, yellow)
+
+        Returns:
+            Dict mapping color name to matching pixel count
+        """
+        unknown = [c for c in colors if c not in self._COLOR_FILTERS]
+        if unknown:
+            raise ValueError(f"Unknown color: {unknown[0]}. Use: {list(self._COLOR_FILTERS.keys())}")
+        if len(colors) > 8:
+            raise ValueError("count_colors supports at most 8 colors per call")
+
+        img_array = self._to_array(screenshot)
+        counts = self._count_ranges(img_array, [self._COLOR_FILTERS[c] for c in colors])
+        return dict(zip(colors, counts))
+
+    def find_red_pixels(self, screenshot: Screenshot) -> int:
         return self.find_colored_pixels(screenshot, 'red')
 
-    def find_green_pixels(self, screenshot: Image.Image) -> int:
+    def find_green_pixels(self, screenshot: Screenshot) -> int:
         return self.find_colored_pixels(screenshot, 'green')
 
-    def find_blue_pixels(self, screenshot: Image.Image) -> int:
+    def find_blue_pixels(self, screenshot: Screenshot) -> int:
         return self.find_colored_pixels(screenshot, 'blue')
 
-    def find_cyan_pixels(self, screenshot: Image.Image) -> int:
+    def find_cyan_pixels(self, screenshot: Screenshot) -> int:
         return self.find_colored_pixels(screenshot, 'cyan')
 
-    def find_magenta_pixels(self, screenshot: Image.Image) -> int:
+    def find_magenta_pixels(self, screenshot: Screenshot) -> int:
         return self.find_colored_pixels(screenshot, 'magenta')
 
-    def find_yellow_pixels(self, screenshot: Image.Image) -> int:
+    def find_yellow_pixels(self, screenshot: Screenshot) -> int:
         return self.find_colored_pixels(screenshot, 'yellow')
 
-    def find_white_pixels(self, screenshot: Image.Image) -> int:
-        return self.find_color_pixels(screenshot, lambda img: np.all(img[:, :, :3] > 150, axis=2))
+    def has_colored_pixels(self, screenshot: Screenshot, color: str, min_pixels: int) -> bool:
+        """Check for more than min_pixels pixels of a specific color."""
+        if color not in self._COLOR_FILTERS:
+            raise ValueError(f"Unknown color: {color}. Use: {list(self._COLOR_FILTERS.keys())}")
+        return self.has_color_pixels(screenshot, self._make_color_filter(*self._COLOR_FILTERS[color]), min_pixels)
+
+    # White/black filters reduce channels first (min/max) and compare once,
+    # instead of materializing an H x W x 3 bool array and reducing it.
+    @staticmethod
+    def _white_filter(img: np.ndarray) -> np.ndarray:
+        return img[:, :, :3].min(axis=2) > 150
+
+    @staticmethod
+    def _non_black_filter(img: np.ndarray) -> np.ndarray:
+        return img[:, :, :3].max(axis=2) > 30
+
+    @staticmethod
+    def _black_filter(img: np.ndarray) -> np.ndarray:
+        return img[:, :, :3].max(axis=2) < 30
 
-    def find_black_pixels(self, screenshot: Image.Image) -> int:
-        return self.find_color_pixels(screenshot, lambda img: np.all(img[:, :, :3] < 30, axis=2))
+    def find_white_pixels(self, screenshot: Screenshot) -> int:
+        return self.find_color_pixels(screenshot, self._white_filter)
 
-    def get_black_ratio(self, screenshot: Image.Image) -> float:
+    def has_white_pixels(self, screenshot: Screenshot, min_pixels: int) -> bool:
+        """Check for more than min_pixels bright (white-ish) pixels."""
+        return self.has_color_pixels(screenshot, self._white_filter, min_pixels)
+
+    def find_black_pixels(self, screenshot: Screenshot) -> int:
+        return self.find_color_pixels(screenshot, self._black_filter)
+
+    def get_black_ratio(self, screenshot: Screenshot) -> float:
         """Get ratio of black pixels in screenshot."""
-        img_array = np.array(screenshot)
+        img_array = self._downsample(screenshot)
         total_pixels = img_array.shape[0] * img_array.shape[1]
-        black_pixels = self.find_black_pixels(screenshot)
+        black_pixels = self.find_black_pixels(img_array)
         return black_pixels / total_pixels
 
     def compare_screenshots(
         self,
-        screenshot1: Image.Image,
-        screenshot2: Image.Image
+        screenshot1: Screenshot,
+        screenshot2: Screenshot
     ) -> int:
         """
         Calculate difference between two screenshots.
 
         Args:
-            screenshot1: First screenshot
-            screenshot2: Second screenshot
+            screenshot1: First screenshot (PIL Image or RGB array)
+            screenshot2: Second screenshot (PIL Image or RGB array)
 
         Returns:
             Total pixel difference value
         """
-        diff = np.sum(np.abs(
-            np.array(screenshot1).astype(np.int16) -
-            np.array(screenshot2).astype(np.int16)
-        ))
-        return int(diff)
+        a = self._to_array(screenshot1)
+        b = self._to_array(screenshot2)
+        # |a - b| in uint8 without widening either frame
+        diff = np.maximum(a, b)
+        diff -= np.minimum(a, b)
+        return int(diff.sum(dtype=np.uint64))
+
+    def frames_differ(
+        self,
+        screenshot1: Screenshot,
+        screenshot2: Screenshot,
+        min_changed: int,
+        step: int = 1,
+        chunk_rows: int = _SLAB_ROWS
+    ) -> bool:
+        """
+        Check whether more than min_changed pixels differ between two screenshots.
+
+        Compares slabs of rows with a plain equality test (no int16 cast or
+        abs/sum temporaries) and stops at the first slab that crosses the
+        threshold. For coarse "did the view change" checks, step compares
+        only every step-th pixel in each direction.
+
+        Args:
+            screenshot1: First screenshot (PIL Image or RGB array)
+            screenshot2: Second screenshot (PIL Image or RGB array)
+            min_changed: Number of changed (sampled) pixels that must be exceeded
+            step: Sampling step (1 = compare every pixel)
+            chunk_rows: Number of rows compared per slab
+
+        Returns:
+            True if more than min_changed pixels differ
+        """
+        a = self._sample(screenshot1, step)
+        b = self._sample(screenshot2, step)
+        if a.shape != b.shape:
+            return True
+        total = 0
+        for row in range(0, a.shape[0], chunk_rows):
+            changed = a[row:row + chunk_rows] != b[row:row + chunk_rows]
+            if changed.ndim == 3:
+                changed = changed.any(axis=2)
+            total += np.count_nonzero(changed)
+            if total > min_changed:
+                return True
+        return False
 
 
 # ============================================================================
@@ -253,29 +664,46 @@ class ScreenAnalyzer:
 class KeyboardController:
     """Handles keyboard input simulation for Windows."""
 
-    def __init__(self, hwnd: Optional[int] = None, key_delay: Optional[float] = None):
+    # Control characters the terminal reads from WM_KEYDOWN rather than WM_CHAR
+    _CONTROL_KEYS = {
+        '\n': win32con.VK_RETURN,
+        '\t': win32con.VK_TAB,
+        '\b': win32con.VK_BACK,
+        '\x1b': win32con.VK_ESCAPE,
+    }
+
+    def __init__(
+        self,
+        hwnd: Optional[int] = None,
+        key_delay: Optional[float] = None,
+        post_messages: Optional[bool] = None
+    ):
         """
         Initialize keyboard controller.
 
         Args:
             hwnd: Window handle to target
             key_delay: Delay between keystrokes (uses config default if None)
+            post_messages: Post WM_CHAR/WM_KEYDOWN to the window instead of
+                injecting global input (uses config default if None)
         """
         self.hwnd = hwnd
         self.key_delay = key_delay or TestConfig.KEY_DELAY
+        self.post_messages = (TestConfig.POST_MESSAGE_INPUT
+                              if post_messages is None else post_messages)
 
     def set_window(self, hwnd: int) -> None:
         """Set target window handle."""
         self.hwnd = hwnd
 
     def _ensure_focus(self) -> None:
-        """Bring target window to foreground."""
-        if self.hwnd:
+        """Bring target window to foreground (no-op if it already has focus)."""
+        if self.hwnd and win32gui.GetForegroundWindow() != self.hwnd:
             try:
                 win32gui.SetForegroundWindow(self.hwnd)
             except (OSError, RuntimeError, pywintypes.error):
                 pass  # Window may not be ready, continue anyway
-            time.sleep(0.1)
+            time.sleep(0.05)
 
     def send_keys(
         self,
@@ -286,41 +714,117 @@ class KeyboardController:
         """
         Send keyboard input.
 
+        With a target window and post_messages enabled, characters are posted
+        straight to the window as WM_CHAR (control keys as WM_KEYDOWN/UP), so
+        no focus is needed. Otherwise the whole string is injected with a
+        single SendInput call. Either way the key delay is applied once at the
+        end (skipped for a lone Enter, whose output callers wait for anyway);
+        passing an explicit delay paces the input one character at a time
+        instead.
+
         Args:
             text: Text to type (supports \\n for Enter)
-            delay: Delay between keystrokes
-            ensure_focus: If True, ensure window has focus first
+            delay: Delay between keystrokes (None = send as one batch)
+            ensure_focus: If True, ensure window has focus first (SendInput only)
         """
+        settle = 0.0 if text == "\n" else self.key_delay
+
+        if self.post_messages and self.hwnd:
+            for char in text:
+                self._post_char(char)
+                if delay is not None:
+                    time.sleep(delay)
+            if delay is None and settle:
+                time.sleep(settle)
+            return
+
         if ensure_focus:
             self._ensure_focus()
 
-        delay = delay or self.key_delay
+        if delay is not None:
+            for char in text:
+                self._send_inputs(self._char_inputs(char))
+                time.sleep(delay)
+            return
 
+        inputs = []
         for char in text:
-            if char == '\n':
-                self._send_key(win32con.VK_RETURN)
-            else:
-                self._send_char(char)
-            time.sleep(delay)
+            inputs.extend(self._char_inputs(char))
+        self._send_inputs(inputs)
+        if settle:
+            time.sleep(settle)
+
+    def _post_char(self, char: str) -> None:
+        """Post a single character to the target window's message queue."""
+        vk_code = self._CONTROL_KEYS.get(char)
+        if vk_code is not None:
+            win32gui.PostMessage(self.hwnd, win32con.WM_KEYDOWN, vk_code, 0x00000001)
+            win32gui.PostMessage(self.hwnd, win32con.WM_KEYUP, vk_code, 0xC0000001)
+            return
 
-    def _send_key(self, vk_code: int, with_shift: bool = False) -> None:
-        """Send a single key press."""
-        if with_shift:
-            win32api.keybd_event(win32con.VK_SHIFT, 0, 0, 0)
+        for unit in self._utf16_units(char):
+            win32gui.PostMessage(self.hwnd, win32con.WM_CHAR, unit, 0x00000001)
 
-        win32api.keybd_event(vk_code, 0, 0, 0)
-        win32api.keybd_event(vk_code, 0, win32con.KEYEVENTF_KEYUP, 0)
+    @staticmethod
+    def _utf16_units(char: str) -> Tuple[int, ...]:
+        """Split a character into UTF-16 code units (surrogate pair outside the BMP)."""
+        code = ord(char)
+        if code <= 0xFFFF:
+            return (code,)
+        code -= 0x10000
+        return (0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
 
+    @staticmethod
+    def _key_input(vk_code: int, key_up: bool = False) -> INPUT:
+        """Build a keyboard INPUT record for one key transition."""
+        event = INPUT(type=INPUT_KEYBOARD)
+        event.ki.wVk = vk_code
+        event.ki.dwFlags = KEYEVENTF_KEYUP if key_up else 0
+        return event
+
+    def _key_inputs(self, vk_code: int, with_shift: bool = False) -> List[INPUT]:
+        """Build the INPUT records for a single key press."""
+        inputs = [self._key_input(vk_code), self._key_input(vk_code, key_up=True)]
         if with_shift:
-            win32api.keybd_event(win32con.VK_SHIFT, 0, win32con.KEYEVENTF_KEYUP, 0)
+            inputs.insert(0, self._key_input(win32con.VK_SHIFT))
+            inputs.append(self._key_input(win32con.VK_SHIFT, key_up=True))
+        return inputs
+
+    def _char_inputs(self, char: str) -> List[INPUT]:
+        """
+        Build the INPUT records for a single character.
+
+        Text is injected as KEYEVENTF_UNICODE events, so no keyboard-layout
+        lookup or synthetic Shift presses are needed and any character can be
+        typed. Control characters use their virtual keys.
+        """
+        vk_code = self._CONTROL_KEYS.get(char)
+        if vk_code is not None:
+            return self._key_inputs(vk_code)
+        inputs = []
+        for unit in self._utf16_units(char):
+            for flags in (KEYEVENTF_UNICODE, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP):
+                event = INPUT(type=INPUT_KEYBOARD)
+                event.ki.wScan = unit
+                event.ki.dwFlags = flags
+                inputs.append(event)
+        return inputs
+
+    @staticmethod
+    def _send_inputs(inputs: List[INPUT]) -> None:
+        """Inject INPUT records with one SendInput call."""
+        if not inputs:
+            return
+        events = (INPUT * len(inputs))(*inputs)
+        user32.SendInput(len(inputs), events, ctypes.sizeof(INPUT))
+
+    def _send_key(self, vk_code: int, with_shift: bool = False) -> None:
+        """Send a single key press."""
+        self._send_inputs(self._key_inputs(vk_code, with_shift))
 
     def _send_char(self, char: str) -> None:
         """Send a single character."""
-        vk = win32api.VkKeyScan(char)
-        if vk != -1:
-            keycode = vk & 0xFF
-            shift = (vk >> 8) & 0x01
-            self._send_key(keycode, with_shift=bool(shift))
+        self._send_inputs(self._char_inputs(char))
 
     # Modifier key mappings
     _MODIFIERS = {
@@ -332,16 +836,12 @@ class KeyboardController:
     def send_special_key(self, vk_code: int, ctrl: bool = False, shift: bool = False, alt: bool = False) -> None:
         """Send a special key with modifiers."""
         self._ensure_focus()
-        mods = [(k, v) for k, v in [('ctrl', ctrl), ('shift', shift), ('alt', alt)] if v]
+        mods = [self._MODIFIERS[k] for k, v in [('ctrl', ctrl), ('shift', shift), ('alt', alt)] if v]
 
-        for name, _ in mods:
-            win32api.keybd_event(self._MODIFIERS[name], 0, 0, 0)
-
-        win32api.keybd_event(vk_code, 0, 0, 0)
-        win32api.keybd_event(vk_code, 0, win32con.KEYEVENTF_KEYUP, 0)
-
-        for name, _ in reversed(mods):
-            win32api.keybd_event(self._MODIFIERS[name], 0, win32con.KEYEVENTF_KEYUP, 0)
+        inputs = [self._key_input(mod) for mod in mods]
+        inputs += [self._key_input(vk_code), self._key_input(vk_code, key_up=True)]
+        inputs += [self._key_input(mod, key_up=True) for mod in reversed(mods)]
+        self._send_inputs(inputs)
 
     def send_ctrl_c(self) -> None:
         """Send Ctrl+C to interrupt running process."""
@@ -363,9 +863,22 @@ class KeyboardController:
 class OCRVerifier:
     """Handles OCR text extraction and verification."""
 
+    # Number of recognized screenshots remembered by ocr_image()
+    _CACHE_SIZE = 64
+
+    # Common OCR substitutions, applied in one str.translate pass
+    _OCR_SUBSTITUTIONS = str.maketrans({
+        '0': 'O', '1': 'L', '|': 'L',
+        'l': 'L', 'I': 'L',
+        '_': '', '-': '',
+        '<': 'K', 'm': 'M', 'W': 'VV',
+    })
+
     def __init__(self):
         """Initialize OCR verifier."""
         self.available = OCR_AVAILABLE
+        # Pixel digest -> recognized text, oldest first
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
 
     def _preprocess_for_ocr(self, img: Image.Image) -> Image.Image:
         """Preprocess image for better OCR accuracy."""
@@ -395,10 +908,25 @@ class OCRVerifier:
         return result.text
 
     def ocr_image(self, img: Image.Image) -> str:
-        """Run OCR on an image (sync wrapper)."""
+        """
+        Run OCR on an image (sync wrapper).
+
+        Results are cached by a digest of the pixels, so asking about an
+        unchanged screen again skips recognition.
+        """
         if not self.available:
             return ""
-        return asyncio.run(self._ocr_image_async(img))
+        key = image_digest(img)
+        text = self._cache.get(key)
+        if text is not None:
+            self._cache.move_to_end(key)
+            return text
+
+        text = asyncio.run(self._ocr_image_async(img))
+        self._cache[key] = text
+        if len(self._cache) > self._CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return text
 
     def _normalize_text(self, text: str) -> str:
         """Normalize OCR text for comparison."""
@@ -407,14 +935,7 @@ class OCRVerifier:
         # Remove extra whitespace
         text = ' '.join(text.split())
         # Common OCR substitutions
-        replacements = {
-            '0': 'O', '1': 'L', '|': 'L',
-            'l': 'L', 'I': 'L',
-            '_': '', '-': '',
-            '<': 'K', 'm': 'M', 'W': 'VV',
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
+        text = text.translate(self._OCR_SUBSTITUTIONS)
         # Remove remaining punctuation
         text = ''.join(c for c in text if c.isalnum() or c.isspace())
         return text
@@ -541,6 +1062,84 @@ class WindowHelper:
             time.sleep(0.1)
         return None
 
+    @staticmethod
+    def find_window_by_pid(pid: int, timeout: float = 5.0) -> Optional[int]:
+        """
+        Find the first visible top-level window owned by a process.
+
+        Args:
+            pid: Process ID that owns the window
+            timeout: Maximum time to wait
+
+        Returns:
+            Window handle or None
+        """
+        import win32process
+
+        start_time = time.time()
+        while time.time() - start_time < timeout:
+            windows: List[int] = []
+
+            def callback(hwnd: int, windows: List[int]) -> bool:
+                if win32gui.IsWindowVisible(hwnd):
+                    try:
+                        _, window_pid = win32process.GetWindowThreadProcessId(hwnd)
+                    except pywintypes.error:
+                        return True
+                    if window_pid == pid:
+                        windows.append(hwnd)
+                return True
+
+            win32gui.EnumWindows(callback, windows)
+            if windows:
+                return windows[0]
+            time.sleep(0.1)
+        return None
+
+    @staticmethod
+    def tile_window(hwnd: int, index: int, count: int) -> None:
+        """
+        Move a window into cell `index` of a grid of `count` cells on the primary screen.
+
+        Used when several terminals run side by side so their client areas
+        (and therefore their screen captures) do not overlap. Only the
+        window's position changes, never its size, so screenshots still
+        match the visual regression baselines. Cells are one client area
+        apart, so neighbouring windows overlap only in their frames.
+
+        Args:
+            hwnd: Window handle
+            index: Cell index (0-based)
+            count: Total number of cells
+
+        Raises:
+            RuntimeError: If the screen cannot fit `count` client areas
+                (screen captures of overlapping windows would be wrong)
+        """
+        left, top, right, bottom = WindowHelper.get_client_rect_screen(hwnd)
+        client_w, client_h = right - left, bottom - top
+        window_left, window_top, _, _ = win32gui.GetWindowRect(hwnd)
+        # Offset of the client area inside the window (title bar, borders)
+        offset_x, offset_y = left - window_left, top - window_top
+
+        screen_w = user32.GetSystemMetrics(win32con.SM_CXSCREEN)
+        screen_h = user32.GetSystemMetrics(win32con.SM_CYSCREEN)
+        cols = max(1, screen_w // max(client_w, 1))
+        rows = max(1, screen_h // max(client_h, 1))
+        if count > cols * rows:
+            raise RuntimeError(
+                f"{count} terminals of {client_w}x{client_h} do not fit on a "
+                f"{screen_w}x{screen_h} screen without overlapping (at most "
+                f"{cols * rows}); run fewer xdist workers"
+            )
+        col, row = index % cols, index // cols
+
+        win32gui.SetWindowPos(
+            hwnd, 0,
+            col * client_w - offset_x, row * client_h - offset_y, 0, 0,
+            win32con.SWP_NOSIZE | win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE
+        )
+
     @staticmethod
     def maximize_window(hwnd: int) -> None:
         """Maximize a window."""
@@ -558,9 +1157,117 @@ class WindowHelper:
         center_x = (rect[0] + rect[2]) // 2
         center_y = (rect[1] + rect[3]) // 2
 
-        win32api.SetCursorPos((center_x, center_y))
-        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
-        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
+        user32.SetCursorPos(center_x, center_y)
+        user32.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
+        user32.mouse_event(win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
+
+
+# ============================================================================
+# ScreenCapture - GDI screen capture
+# ============================================================================
+
+class ScreenCapture:
+    """
+    Captures screen regions with GDI BitBlt straight into a NumPy buffer.
+
+    Keeps a memory DC with a 32-bit top-down DIB section selected into it,
+    so each capture is a single BitBlt into memory that NumPy reads in
+    place. The DIB section is only recreated when the capture size changes.
+    """
+
+    def __init__(self):
+        """Initialize capture state (GDI objects are created lazily)."""
+        self._hdc_screen = None
+        self._hdc_mem = None
+        self._hbmp = None
+        self._old_obj = None
+        self._pixels: Optional[np.ndarray] = None
+
+    def _ensure_surface(self, width: int, height: int) -> None:
+        """Create (or resize) the memory DC and DIB section."""
+        if self._pixels is not None and self._pixels.shape[:2] == (height, width):
+            return
+        self.close()
+
+        self._hdc_screen = user32.GetDC(None)
+        if not self._hdc_screen:
+            raise OSError("GetDC failed")
+        self._hdc_mem = gdi32.CreateCompatibleDC(self._hdc_screen)
+
+        bmi = BITMAPINFO()
+        bmi.bmiHeader.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+        bmi.bmiHeader.biWidth = width
+        bmi.bmiHeader.biHeight = -height  # Negative height = top-down rows
+        bmi.bmiHeader.biPlanes = 1
+        bmi.bmiHeader.biBitCount = 32
+        bmi.bmiHeader.biCompression = BI_RGB
+
+        bits = ctypes.c_void_p()
+        self._hbmp = gdi32.CreateDIBSection(
+            self._hdc_mem, ctypes.byref(bmi), DIB_RGB_COLORS, ctypes.byref(bits), None, 0
+        )
+        if not self._hbmp or not bits.value:
+            self.close()
+            raise OSError("CreateDIBSection failed")
+        self._old_obj = gdi32.SelectObject(self._hdc_mem, self._hbmp)
+
+        buffer = (ctypes.c_uint8 * (width * height * 4)).from_address(bits.value)
+        self._pixels = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 4)
+
+    def grab_array(self, rect: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Capture a screen rectangle as a BGRX array.
+
+        The returned array is a view of the DIB section and is overwritten
+        by the next capture; copy it if it must outlive that.
+
+        Args:
+            rect: (left, top, right, bottom) in screen coordinates
+
+        Returns:
+            (height, width, 4) uint8 array in BGRX byte order
+
+        Raises:
+            OSError: If any GDI call fails
+        """
+        left, top, right, bottom = rect
+        width, height = right - left, bottom - top
+        if width <= 0 or height <= 0:
+            raise OSError(f"Invalid capture rect: {rect}")
+
+        self._ensure_surface(width, height)
+        if not gdi32.BitBlt(self._hdc_mem, 0, 0, width, height,
+                            self._hdc_screen, left, top, SRCCOPY | CAPTUREBLT):
+            raise OSError("BitBlt failed")
+        gdi32.GdiFlush()  # Make sure GDI has finished writing the DIB
+        return self._pixels
+
+    def grab(self, rect: Tuple[int, int, int, int]) -> Image.Image:
+        """
+        Capture a screen rectangle as an RGB image.
+
+        Args:
+            rect: (left, top, right, bottom) in screen coordinates
+
+        Returns:
+            PIL Image in RGB mode (owns a copy of the pixels)
+        """
+        pixels = self.grab_array(rect)
+        height, width = pixels.shape[:2]
+        return Image.frombuffer('RGB', (width, height), pixels, 'raw', 'BGRX', 0, 1)
+
+    def close(self) -> None:
+        """Release GDI resources."""
+        self._pixels = None
+        if self._hdc_mem:
+            if self._old_obj:
+                gdi32.SelectObject(self._hdc_mem, self._old_obj)
+            gdi32.DeleteDC(self._hdc_mem)
+        if self._hbmp:
+            gdi32.DeleteObject(self._hbmp)
+        if self._hdc_screen:
+            user32.ReleaseDC(None, self._hdc_screen)
+        self._hdc_screen = self._hdc_mem = self._hbmp = self._old_obj = None
 
 
 # ============================================================================
@@ -574,6 +1281,19 @@ class TerminalTester:
     Manages terminal lifecycle and provides high-level testing methods.
     """
 
+    # Pixel step of the coarse sample polled by wait_until_settled
+    _SETTLE_STEP = 4
+    # Extra time (beyond the quiet period) after which an unchanged screen counts as settled
+    _SETTLE_UNCHANGED = 0.2
+
+    # Glyphs the tests draw, rendered once by warm_up() to fill the glyph atlas
+    _WARMUP_TEXT = (
+        "ABCDEFGHIJKLMNOPQRSTUVWXYZ abcdefghijklmnopqrstuvwxyz 0123456789 "
+        "\u250c\u2500\u2510\u2502\u2514\u2518 \u2554\u2550\u2557\u2551\u255a\u255d "
+        "\u2588\u2593\u2592\u2591 \u4e2d\u6587\u3042\ud55c "
+        "\u2190\u2191\u2192\u2193 \u00b1\u00d7\u00f7 \u03b1\u03b2\u03b3 \u2764\u2605"
+    )
+
     def __init__(self, terminal_exe: Optional[str] = None):
         """
         Initialize the terminal tester.
@@ -585,8 +1305,24 @@ class TerminalTester:
         self.screenshot_dir = TestConfig.SCREENSHOT_DIR
         self.process: Optional[subprocess.Popen] = None
         self.hwnd: Optional[int] = None
+        self._client_rect: Optional[Tuple[int, int, int, int]] = None
         self._keyboard = KeyboardController()
         self._analyzer = ScreenAnalyzer()
+        self._capture = ScreenCapture()
+        # (stem, image) of unsaved captures, written out only if a test fails
+        self._recent_screenshots: deque = deque(maxlen=TestConfig.SCREENSHOT_HISTORY)
+        # Screenshot files are encoded off the test thread; the pool is
+        # created by start_terminal (or the first write) and shut down by cleanup()
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+        self._pending_writes: List[Future] = []
+        # (pixel digest, suffix) -> first file written with that content (I/O thread only)
+        self._written_screenshots: Dict[Tuple[bytes, str], Path] = {}
+        # Reused copies of the last polled frame (see _keep_frame)
+        self._frame_buffers: Dict[str, np.ndarray] = {}
+        # Shared so its OCR cache lasts the whole session
+        self._ocr = OCRVerifier()
+        # Informational messages, written out once by flush_log()
+        self._log = io.StringIO()
         TestConfig.ensure_dirs()
 
     def start_terminal(self) -> bool:
@@ -596,6 +1332,7 @@ class TerminalTester:
         Returns:
             True if terminal started successfully
         """
+        self._writer()
         try:
             self.process = subprocess.Popen(
                 [self.terminal_exe],
@@ -603,46 +1340,45 @@ class TerminalTester:
             )
             time.sleep(TestConfig.STARTUP_WAIT)
 
-            # Find the terminal window
-            self.hwnd = WindowHelper.find_window_by_title("TerminalDX12", timeout=5.0)
-            if not self.hwnd:
-                # Try finding by process
+            # Find the terminal window. With several workers each running a
+            # terminal, the title is ambiguous - only trust our own process.
+            if TestConfig.WORKER_COUNT > 1:
                 self._find_window_by_process()
+            else:
+                self.hwnd = WindowHelper.find_window_by_title("TerminalDX12", timeout=5.0)
+                if not self.hwnd:
+                    # Try finding by process
+                    self._find_window_by_process()
 
-            if self.hwnd:
-                self._keyboard.set_window(self.hwnd)
-                # Bring to foreground
-                try:
-                    win32gui.SetForegroundWindow(self.hwnd)
-                except (OSError, RuntimeError, pywintypes.error):
-                    pass  # Window may not be ready
-                return True
-            return False
+            if not self.hwnd:
+                return False
         except Exception as e:
             print(f"Failed to start terminal: {e}")
             return False
 
+        tiled = TestConfig.WORKER_COUNT > 1
+        if tiled:
+            # Raises (failing the run) if the workers' terminals would overlap
+            WindowHelper.tile_window(
+                self.hwnd, TestConfig.worker_index(), TestConfig.WORKER_COUNT)
+        self._keyboard.set_window(self.hwnd)
+        # Bring to foreground. Tiled windows don't overlap and posted
+        # input needs no focus, so workers don't fight over it.
+        if not (tiled and self._keyboard.post_messages):
+            try:
+                win32gui.SetForegroundWindow(self.hwnd)
+            except (OSError, RuntimeError, pywintypes.error):
+                pass  # Window may not be ready
+        self.get_client_rect_screen(force=True)
+        return True
+
     def _find_window_by_process(self) -> None:
         """Find window by process ID if title search fails."""
         if not self.process:
             return
 
-        def callback(hwnd, windows):
-            if win32gui.IsWindowVisible(hwnd):
-                try:
-                    _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                    if pid == self.process.pid:
-                        windows.append(hwnd)
-                except Exception:
-                    pass
-            return True
-
         try:
-            import win32process
-            windows = []
-            win32gui.EnumWindows(callback, windows)
-            if windows:
-                self.hwnd = windows[0]
+            self.hwnd = WindowHelper.find_window_by_pid(self.process.pid, timeout=5.0)
         except ImportError:
             pass
 
@@ -659,6 +1395,33 @@ class TerminalTester:
                     pass  # Process already terminated
             self.process = None
         self.hwnd = None
+        self._client_rect = None
+        self._recent_screenshots.clear()
+        self._frame_buffers.clear()
+        self.flush_screenshots()
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
+        self._written_screenshots.clear()
+        self._capture.close()
+        self.flush_log()
+
+    def log(self, message: str) -> None:
+        """Buffer an informational message instead of printing it immediately."""
+        print(message, file=self._log)
+
+    def flush_log(self) -> None:
+        """Print buffered messages in one write and append them to TestConfig.LOG_FILE."""
+        text = self._log.getvalue()
+        if not text:
+            return
+        self._log = io.StringIO()
+        print(text, end="")
+        try:
+            with open(TestConfig.LOG_FILE, "a", encoding="utf-8") as f:
+                f.write(text)
+        except OSError as e:
+            print(f"  Could not write test log: {e}")
 
     def send_keys(self, text: str, delay: float = None) -> None:
         """
@@ -670,53 +1433,216 @@ class TerminalTester:
         """
         self._keyboard.send_keys(text, delay=delay)
 
+    def set_post_messages(self, enabled: bool) -> bool:
+        """
+        Choose between posted WM_CHAR input and SendInput for typed text.
+
+        Args:
+            enabled: Post messages to the window (True) or use SendInput (False)
+
+        Returns:
+            The previous setting, so callers can restore it
+        """
+        previous = self._keyboard.post_messages
+        self._keyboard.post_messages = enabled
+        return previous
+
     def wait_and_screenshot(
         self,
         name: str,
         wait_stable: bool = True,
-        max_wait: Optional[float] = None
-    ) -> Tuple[Image.Image, Path]:
+        max_wait: Optional[float] = None,
+        save: Optional[bool] = None
+    ) -> Tuple[Image.Image, Optional[Path]]:
         """
         Wait for screen stability and capture screenshot.
 
+        Unless saving is requested, the capture is only kept in memory and
+        written out by save_recent_screenshots() if the test fails.
+
         Args:
             name: Base name for screenshot file
             wait_stable: If True, wait for screen to stabilize
             max_wait: Maximum time to wait for stability
+            save: Write the file now (defaults to TestConfig.SAVE_SCREENSHOTS)
 
         Returns:
-            Tuple of (PIL Image, Path to saved file)
+            Tuple of (PIL Image, Path to saved file or None if not saved)
         """
         if wait_stable:
             self._wait_for_stability(max_wait or TestConfig.MAX_WAIT)
 
         screenshot = self._capture_screenshot()
+        stem = f"{name}_{int(time.time())}{TestConfig.worker_suffix()}"
+
+        if save is None:
+            save = TestConfig.SAVE_SCREENSHOTS
+        if not save:
+            self._recent_screenshots.append((stem, screenshot))
+            return screenshot, None
 
-        # Save screenshot
-        filename = f"{name}_{int(time.time())}.png"
-        filepath = self.screenshot_dir / filename
-        screenshot.save(filepath)
+        filepath = self._save_screenshot(stem, screenshot)
 
         return screenshot, filepath
 
+    def save_recent_screenshots(self) -> List[Path]:
+        """
+        Write out the unsaved captures kept since the last reset.
+
+        Called on test failure; captures are written as full-resolution PNGs
+        on the background writer, so the next test can start straight away.
+
+        Returns:
+            List of paths being written
+        """
+        paths = []
+        while self._recent_screenshots:
+            stem, screenshot = self._recent_screenshots.popleft()
+            filepath = self.screenshot_dir / f"{stem}.png"
+            self._submit_write(filepath, screenshot)
+            paths.append(filepath)
+        return paths
+
+    def discard_recent_screenshots(self) -> None:
+        """Drop unsaved captures (called after a passing test)."""
+        self._recent_screenshots.clear()
+
+    def _save_screenshot(self, stem: str, screenshot: Image.Image) -> Path:
+        """
+        Save a screenshot artifact to the screenshot directory.
+
+        Artifacts are written as downsized JPEGs (no optimize pass, which only
+        buys a few percent of file size). The downscale is BILINEAR unless
+        HQ_SCREENSHOTS/--hq-screenshots asks for LANCZOS. Set
+        DEBUG_SCREENSHOTS=1 to keep full-resolution PNGs instead.
+
+        Encoding runs on a background thread so the test can carry on with
+        the in-memory image; flush_screenshots() waits for pending writes.
+
+        Args:
+            stem: File name without extension
+            screenshot: Captured RGB image
+
+        Returns:
+            Path the file is being written to
+        """
+        extension = "png" if TestConfig.DEBUG_SCREENSHOTS else "jpg"
+        filepath = self.screenshot_dir / f"{stem}.{extension}"
+        self._submit_write(filepath, screenshot)
+        return filepath
+
+    def _submit_write(self, filepath: Path, screenshot: Image.Image) -> None:
+        """Queue a screenshot write, reaping writes that have already finished."""
+        pending = []
+        for future in self._pending_writes:
+            if future.done():
+                self._report_write(future)
+            else:
+                pending.append(future)
+        pending.append(self._writer().submit(self._store_screenshot, filepath, screenshot))
+        self._pending_writes = pending
+
+    def _writer(self) -> ThreadPoolExecutor:
+        """Return the screenshot I/O pool, creating it if needed."""
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=1)
+        return self._io_pool
+
+    def flush_screenshots(self) -> None:
+        """Wait for background screenshot writes to finish."""
+        while self._pending_writes:
+            self._report_write(self._pending_writes.pop())
+
+    @staticmethod
+    def _report_write(future: Future) -> None:
+        """Wait for one write and report (but do not raise) I/O errors."""
+        try:
+            future.result()
+        except OSError as e:
+            print(f"  Could not save screenshot: {e}")
+
+    def _store_screenshot(self, filepath: Path, screenshot: Image.Image) -> None:
+        """
+        Write a screenshot artifact (runs on the I/O thread).
+
+        A frame identical to one already written this session (a cleared
+        screen, say) is hard-linked to the earlier file instead of being
+        encoded again.
+        """
+        key = (image_digest(screenshot), filepath.suffix)
+        existing = self._written_screenshots.get(key)
+        if existing is not None:
+            try:
+                os.link(existing, filepath)
+                return
+            except OSError:
+                pass  # Original removed, name taken or no hard links - write a copy
+        self._write_screenshot(filepath, screenshot)
+        self._written_screenshots[key] = filepath
+
+    @staticmethod
+    def _write_screenshot(filepath: Path, screenshot: Image.Image) -> None:
+        """
+        Encode and write one screenshot artifact (runs on the I/O thread).
+
+        The file is written beside the target and renamed over it, so a
+        path that is a hard link to an earlier duplicate gets a new file
+        rather than rewriting every linked copy.
+        """
+        tmp_path = filepath.with_name(filepath.name + ".tmp")
+        if filepath.suffix == ".png":
+            # Fast deflate: these are debugging artifacts, not archives
+            screenshot.save(tmp_path, "PNG", compress_level=1)
+            os.replace(tmp_path, filepath)
+            return
+
+        max_size = TestConfig.MAX_SCREENSHOT_SIZE
+        width, height = screenshot.size
+        scale = max_size / max(width, height)
+        if scale < 1:
+            new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+            resample = (Image.Resampling.LANCZOS if TestConfig.HQ_SCREENSHOTS
+                        else Image.Resampling.BILINEAR)
+            # reducing_gap box-reduces by an integer factor first (as thumbnail()
+            # does); thumbnail() itself would mutate the image the test still holds
+            screenshot = screenshot.resize(new_size, resample, reducing_gap=2.0)
+        screenshot.save(tmp_path, "JPEG", quality=TestConfig.JPEG_QUALITY)
+        os.replace(tmp_path, filepath)
+
     def _wait_for_stability(self, max_wait: float) -> None:
         """Wait for screen to stop changing."""
         start_time = time.time()
-        last_screenshot = self._capture_screenshot()
+        # Poll raw frames; the previous one is kept in a reused buffer
+        last_frame = self._keep_frame(self._capture_frame(), 'stability')
         stable_since = time.time()
 
         while time.time() - start_time < max_wait:
             time.sleep(TestConfig.POLL_INTERVAL)
-            current = self._capture_screenshot()
+            current = self._capture_frame()
 
-            diff = self._analyzer.compare_screenshots(last_screenshot, current)
-            if diff < TestConfig.SCREEN_CHANGE_THRESHOLD:
+            if not self._analyzer.frames_differ(
+                    last_frame, current, TestConfig.SCREEN_CHANGE_PIXELS):
                 if time.time() - stable_since >= TestConfig.STABILITY_TIME:
                     return
             else:
                 stable_since = time.time()
 
-            last_screenshot = current
+            last_frame = self._keep_frame(current, 'stability')
+
+    def _capture_frame(self) -> np.ndarray:
+        """
+        Capture the terminal window as an array, skipping the PIL conversion.
+
+        Returns a BGRX view of the capture buffer, which the next capture
+        overwrites - copy it to keep it. Falls back to an RGB array if GDI
+        capture is unavailable.
+        """
+        if self.hwnd:
+            try:
+                return self._capture.grab_array(self.get_client_rect_screen())
+            except OSError:
+                pass
+        return np.asarray(self._capture_screenshot())
 
     def _capture_screenshot(self) -> Image.Image:
         """Capture screenshot of terminal window."""
@@ -724,8 +1650,12 @@ class TerminalTester:
             return Image.new('RGB', (100, 100), color='black')
 
         try:
-            rect = WindowHelper.get_client_rect_screen(self.hwnd)
-            return ImageGrab.grab(bbox=rect)
+            rect = self.get_client_rect_screen()
+            try:
+                return self._capture.grab(rect)
+            except OSError:
+                # Fall back to PIL's capture path if GDI capture fails
+                return ImageGrab.grab(bbox=rect)
         except (OSError, RuntimeError):
             return Image.new('RGB', (100, 100), color='black')
 
@@ -757,9 +1687,8 @@ class TerminalTester:
             # Fall back to basic text presence check
             return self._analyzer.analyze_text_presence(screenshot), "(OCR not available)"
 
-        ocr = OCRVerifier()
-        ocr_text = ocr.ocr_image(screenshot)
-        found = ocr.contains(ocr_text, expected, threshold)
+        ocr_text = self._ocr.ocr_image(screenshot)
+        found = self._ocr.contains(ocr_text, expected, threshold)
         return found, ocr_text
 
     def get_screen_text(self, screenshot: Image.Image = None) -> str:
@@ -778,19 +1707,43 @@ class TerminalTester:
         if not OCR_AVAILABLE:
             return "(OCR not available)"
 
-        ocr = OCRVerifier()
-        return ocr.ocr_image(screenshot)
+        return self._ocr.ocr_image(screenshot)
 
-    def get_client_rect_screen(self) -> Tuple[int, int, int, int]:
+    def get_client_rect_screen(self, force: bool = False) -> Tuple[int, int, int, int]:
         """
         Get client area rectangle in screen coordinates.
 
+        The rect is cached after the first lookup; tests that move or resize
+        the window must call invalidate_client_rect() afterwards.
+
+        Args:
+            force: If True, query the window even if a cached rect exists
+
         Returns:
             (left, top, right, bottom) tuple
         """
         if not self.hwnd:
             return (0, 0, 100, 100)
-        return WindowHelper.get_client_rect_screen(self.hwnd)
+        if force or self._client_rect is None:
+            self._client_rect = WindowHelper.get_client_rect_screen(self.hwnd)
+        return self._client_rect
+
+    def invalidate_client_rect(self) -> None:
+        """Drop the cached client rect (call after moving/resizing the window)."""
+        self._client_rect = None
+
+    def move_window(self, left: int, top: int, width: int, height: int) -> None:
+        """
+        Move/resize the terminal window and refresh the cached client rect.
+
+        Args:
+            left: New left edge in screen coordinates
+            top: New top edge in screen coordinates
+            width: New window width
+            height: New window height
+        """
+        win32gui.MoveWindow(self.hwnd, left, top, width, height, True)
+        self.get_client_rect_screen(force=True)
 
     def send_ctrl_key(self, key: str) -> None:
         """
@@ -819,10 +1772,112 @@ class TerminalTester:
         self._keyboard.send_page_down(with_shift=with_shift)
 
     def send_command(self, command: str, wait: float = None) -> None:
-        """Send a command and wait for rendering."""
+        """Send a command and wait (at most `wait` seconds) for rendering to settle."""
         from config import TestConfig
+        # Sample the screen before typing so output that lands before the
+        # first poll still counts as a change
+        reference = self.settle_reference()
         self.send_keys(command + "\n")
-        time.sleep(wait or TestConfig.RENDER_WAIT)
+        self.wait_until_settled(wait or TestConfig.RENDER_WAIT, reference=reference)
+
+    def clear_screen(self, wait: float = None) -> None:
+        """Clear the terminal and wait (at most `wait` seconds, default CLEAR_WAIT) for the redraw."""
+        self.send_command("cls", wait=wait or TestConfig.CLEAR_WAIT)
+
+    def warm_up(self) -> None:
+        """
+        Render the glyphs the tests use once, then clear the screen.
+
+        The first test to draw a glyph would otherwise also pay for (and
+        capture) the glyph atlas growing, making timings and baselines
+        depend on test order.
+        """
+        self.send_command(f"Write-Host '{self._WARMUP_TEXT}'")
+        self.clear_screen()
+
+    def settle_reference(self) -> Optional[np.ndarray]:
+        """
+        Sample the screen before sending input, for wait_until_settled(reference=...).
+
+        Returns:
+            Coarse copy of the current frame (None without a window)
+        """
+        if not self.hwnd:
+            return None
+        step = self._SETTLE_STEP
+        return self._keep_frame(self._capture_frame()[::step, ::step], 'settle_reference')
+
+    def wait_until_settled(
+        self,
+        max_wait: float,
+        quiet: Optional[float] = None,
+        reference: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Wait until the terminal has redrawn and stopped changing.
+
+        Polls a coarse sample of the window and returns once the screen has
+        changed and then stayed the same for `quiet` seconds. A screen that
+        never changes (e.g. a click that draws nothing) counts as settled
+        after `quiet` plus a short grace period. max_wait caps the wait.
+
+        Args:
+            max_wait: Maximum time to wait (the fixed sleep this replaces)
+            quiet: How long the screen must stay unchanged (default SETTLE_TIME)
+            reference: settle_reference() sample taken before the input was
+                sent; changes are measured from it rather than from the
+                first poll
+        """
+        if not self.hwnd:
+            time.sleep(max_wait)
+            return
+
+        quiet = TestConfig.SETTLE_TIME if quiet is None else quiet
+        # Poll at least twice per quiet period so short waits can end early
+        interval = min(TestConfig.POLL_INTERVAL, quiet / 2) or TestConfig.POLL_INTERVAL
+        started = time.time()
+        deadline = started + max_wait
+        step = self._SETTLE_STEP
+        if reference is None:
+            reference = self._capture_frame()[::step, ::step]
+        previous = self._keep_frame(reference, 'settle')
+        changed_at = None
+
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(interval, remaining))
+            current = self._capture_frame()[::step, ::step]
+            if not np.array_equal(current, previous):
+                changed_at = time.time()
+                previous = self._keep_frame(current, 'settle')
+            elif changed_at is not None:
+                if time.time() - changed_at >= quiet:
+                    return
+            elif time.time() - started >= quiet + self._SETTLE_UNCHANGED:
+                return
+
+    def _keep_frame(self, frame: np.ndarray, slot: str) -> np.ndarray:
+        """
+        Copy a frame into a reusable per-purpose buffer.
+
+        Capture views are overwritten by the next capture, so pollers keep
+        the previous frame here; the buffer is only reallocated when the
+        window size changes.
+
+        Args:
+            frame: Frame (or view of one) to keep
+            slot: Buffer name, one per polling loop
+
+        Returns:
+            The buffer holding a copy of frame
+        """
+        buffer = self._frame_buffers.get(slot)
+        if buffer is None or buffer.shape != frame.shape:
+            buffer = self._frame_buffers[slot] = np.empty_like(frame)
+        np.copyto(buffer, frame)
+        return buffer
 
     def assert_renders(self, name: str, expected_text: str = None) -> Image.Image:
         """
@@ -837,10 +1892,51 @@ class TerminalTester:
         """
         screenshot, _ = self.wait_and_screenshot(name)
         assert self.analyze_text_presence(screenshot), f"{name}: text not visible"
+        self._log_ocr_match(name, screenshot, expected_text)
+        return screenshot
 
-        if expected_text and OCR_AVAILABLE:
-            ocr_text = self.get_screen_text(screenshot)
-            if expected_text.upper() in ocr_text.upper():
-                print(f"{name}: '{expected_text}' verified via OCR")
+    def assert_color_renders(
+        self,
+        name: str,
+        color: str,
+        min_pixels: int = 50,
+        expected_text: str = None,
+        before: Optional[Image.Image] = None
+    ) -> Image.Image:
+        """
+        Take screenshot and assert text of a given color is visible.
+
+        Args:
+            name: Screenshot name for debugging
+            color: Color name understood by ScreenAnalyzer.has_colored_pixels
+            min_pixels: Pixel count that must be exceeded
+            expected_text: Optional text to verify via OCR
+            before: Screenshot taken before Enter; if given, only pixels that
+                changed since then are counted, so the syntax-highlighted
+                command line cannot satisfy the color check
 
+        Returns:
+            The captured screenshot
+        """
+        screenshot, _ = self.wait_and_screenshot(name)
+        img_array = np.asarray(screenshot)  # Convert once for both checks
+        assert self._analyzer.analyze_text_presence(img_array), f"{name}: text not visible"
+        if before is not None:
+            changed = (img_array != np.asarray(before)).any(axis=2)
+            img_array = img_array * changed[..., np.newaxis]
+        assert self._analyzer.has_colored_pixels(img_array, color, min_pixels), \
+            f"{name}: expected more than {min_pixels} {color} pixels"
+        self._log_ocr_match(name, screenshot, expected_text)
         return screenshot
+
+    def _log_ocr_match(self, name: str, screenshot: Image.Image, expected_text: Optional[str]) -> None:
+        """
+        Report when expected text is found via OCR (informational only).
+
+        Text presence has already been asserted from pixel counts, so the
+        OCR pass only runs when VERBOSE_OCR/--verbose-ocr opts in.
+        """
+        if expected_text and OCR_AVAILABLE and TestConfig.VERBOSE_OCR:
+            ocr_text = self.get_screen_text(screenshot)
+            if expected_text.upper() in ocr_text.upper():
+                self.log(f"{name}: '{expected_text}' verified via OCR")
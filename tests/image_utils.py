@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Image utilities shared by the TerminalDX12 test helpers.
+
+Kept free of Windows-only imports so both helpers.py and
+visual_regression.py can use them.
+"""
+
+import hashlib
+
+from PIL import Image
+
+__all__ = [
+    'image_digest',
+]
+
+
+def image_digest(img: Image.Image) -> bytes:
+    """Digest an image's mode, size and pixels (identifies identical frames)."""
+    digest = hashlib.blake2b(img.tobytes(), digest_size=16)
+    digest.update(f"{img.mode}{img.size}".encode())
+    return digest.digest()
@@ -42,13 +42,15 @@ class TestBoldAttribute:
 
     def test_bold_brighter_than_normal(self, terminal):
         """Bold text should be brighter than normal text."""
-        terminal.send_command("$e = [char]27; Write-Host \"NORMAL_TEXT\"", wait=0.2)
-        terminal.send_command("$e = [char]27; Write-Host \"${e}[1mBOLD_BRIGHT${e}[0m\"")
+        terminal.send_command(
+            "$e = [char]27; "
+            "Write-Host \"NORMAL_TEXT\"; "
+            "Write-Host \"${e}[1mBOLD_BRIGHT${e}[0m\""
+        )
 
         screenshot = terminal.assert_renders("attr_bold_brightness")
         analyzer = ScreenAnalyzer()
-        white_pixels = analyzer.find_white_pixels(screenshot)
-        assert white_pixels > 50, "Expected bright pixels for bold text"
+        assert analyzer.has_white_pixels(screenshot, 50), "Expected bright pixels for bold text"
 
 
 @pytest.mark.attributes
@@ -61,8 +63,7 @@ class TestInverseAttribute:
 
         screenshot = terminal.assert_renders("attr_inverse_swap")
         analyzer = ScreenAnalyzer()
-        white_pixels = analyzer.find_white_pixels(screenshot)
-        assert white_pixels > 100, f"Expected inverse background, found {white_pixels} light pixels"
+        assert analyzer.has_white_pixels(screenshot, 100), "Expected inverse background (light pixels)"
 
 
 @pytest.mark.attributes
@@ -11,6 +11,9 @@ import win32api
 import win32clipboard
 import win32con
 
+# Clipboard, cursor and keybd_event input are desktop-global
+pytestmark = pytest.mark.serial
+
 
 def set_clipboard_text(text: str) -> None:
     """Set clipboard content to given text."""
@@ -42,7 +45,7 @@ class TestPaste:
         terminal.send_keys("echo ")
         time.sleep(0.2)
         terminal.send_ctrl_key('v')
-        time.sleep(0.3)
+        terminal.wait_until_settled(0.3)
         terminal.send_command("")
         terminal.assert_renders("clipboard_paste", "CLIPBOARD")
 
@@ -51,7 +54,7 @@ class TestPaste:
         set_clipboard_text("LINE_ONE\nLINE_TWO\nLINE_THREE")
         terminal.send_command("echo 'Pasting multiline:'", wait=0.3)
         terminal.send_ctrl_key('v')
-        time.sleep(0.5)
+        terminal.wait_until_settled(0.5)
         terminal.send_command("")
         terminal.assert_renders("clipboard_multiline")
 
@@ -60,7 +63,7 @@ class TestPaste:
         set_clipboard_text("TEST_123_ABC")
         terminal.send_keys("echo ")
         terminal.send_ctrl_key('v')
-        time.sleep(0.3)
+        terminal.wait_until_settled(0.3)
         terminal.send_command("")
         terminal.assert_renders("clipboard_special", "TEST")
 
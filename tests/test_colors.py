@@ -18,6 +18,20 @@ ANSI_COLORS = [
     ("36", "cyan"),
 ]
 
+# Color rendering test cases: (name, command, ocr_text, color, min_pixels)
+COLOR_TESTS = [
+    (
+        f"ansi_{name}",
+        f"$e = [char]27; Write-Host \"${{e}}[{code}mANSI_{name.upper()}_TEST${{e}}[0m\"",
+        f"ANSI_{name.upper()}",
+        name,
+        50,
+    )
+    for code, name in ANSI_COLORS
+] + [
+    ("bg_red", "Write-Host '  BG_TEST  ' -BackgroundColor Red", "BG_TEST", "red", 50),
+]
+
 
 @pytest.mark.color
 class TestBasicColors:
@@ -43,8 +57,10 @@ class TestMultipleColors:
 
     def test_color_persistence(self, terminal):
         """Color changes persist across multiple outputs."""
-        for i, color in enumerate(["Red", "Green", "Blue"], 1):
-            terminal.send_command(f"Write-Host 'LINE{i}' -ForegroundColor {color}", wait=0.2)
+        terminal.send_command("; ".join(
+            f"Write-Host 'LINE{i}' -ForegroundColor {color}"
+            for i, color in enumerate(["Red", "Green", "Blue"], 1)
+        ))
         terminal.assert_renders("color_persistence")
 
 
@@ -69,6 +85,21 @@ class TestAnsiEscapeColors:
         terminal.assert_renders("color_true", "TRUE_COLOR")
 
 
+@pytest.mark.color
+class TestColorPixels:
+    """Table-driven tests that verify the expected color reaches the screen."""
+
+    @pytest.mark.parametrize("name,command,ocr,color,min_pixels", COLOR_TESTS)
+    def test_color_pixels(self, terminal, name, command, ocr, color, min_pixels):
+        """Colored output renders with enough pixels of the expected color."""
+        # Capture the typed (syntax-highlighted) command line before Enter so
+        # only the command's output is checked for the color
+        terminal.send_keys(command)
+        typed, _ = terminal.wait_and_screenshot(f"color_{name}_typed")
+        terminal.send_command("")
+        terminal.assert_color_renders(f"color_{name}", color, min_pixels, ocr, before=typed)
+
+
 @pytest.mark.color
 class TestBackgroundColors:
     """Tests for background color rendering."""
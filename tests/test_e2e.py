@@ -10,6 +10,9 @@ import time
 import win32api
 import win32con
 
+# Clipboard, cursor and keybd_event input are desktop-global
+pytestmark = pytest.mark.serial
+
 
 @pytest.mark.slow
 class TestE2EWorkflow:
@@ -23,7 +26,7 @@ class TestE2EWorkflow:
         for _ in range(count):
             win32api.mouse_event(win32con.MOUSEEVENTF_WHEEL, 0, 0, direction * 120, 0)
             time.sleep(0.1)
-        time.sleep(0.3)
+        terminal.wait_until_settled(0.3)
 
     def test_full_session_workflow(self, terminal):
         """Complete user workflow: type commands, verify output, scroll."""
@@ -51,8 +54,8 @@ class TestE2EWorkflow:
             terminal.send_command(f"echo {cmd}", wait=0.3)
 
         screenshot = terminal.assert_renders("e2e_commands")
-        ocr = terminal.get_screen_text(screenshot)
-        found = sum(1 for c in commands if c in ocr.upper())
+        ocr = terminal.get_screen_text(screenshot).upper()
+        found = sum(1 for c in commands if c in ocr)
         print(f"E2E commands: found {found}/{len(commands)} markers")
 
     def test_interactive_input(self, terminal):
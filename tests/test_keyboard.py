@@ -11,6 +11,17 @@ import win32api
 import win32con
 from helpers import ScreenAnalyzer
 
+# Clipboard, cursor and keybd_event input are desktop-global
+pytestmark = pytest.mark.serial
+
+
+@pytest.fixture(autouse=True)
+def send_input(terminal):
+    """Type through SendInput even with POST_MESSAGE_INPUT=1 - these tests cover real keyboard delivery."""
+    previous = terminal.set_post_messages(False)
+    yield
+    terminal.set_post_messages(previous)
+
 
 class TestScrolling:
     """Mouse wheel scrolling tests."""
@@ -24,7 +35,7 @@ class TestScrolling:
         for _ in range(count):
             win32api.mouse_event(win32con.MOUSEEVENTF_WHEEL, 0, 0, direction * 120, 0)
             time.sleep(0.1)
-        time.sleep(0.3)
+        terminal.wait_until_settled(0.3)
 
     def test_scroll_up_changes_view(self, terminal):
         """Scrolling up shows different content."""
@@ -34,8 +45,8 @@ class TestScrolling:
         self._scroll_wheel(terminal, 1)  # Scroll up
         screenshot_after, _ = terminal.wait_and_screenshot("keyboard_after_scroll_up")
 
-        diff = ScreenAnalyzer().compare_screenshots(screenshot_before, screenshot_after)
-        assert diff > 5000, "Screen did not change after scroll up"
+        assert ScreenAnalyzer().frames_differ(screenshot_before, screenshot_after, 25, step=4), \
+            "Screen did not change after scroll up"
 
     def test_scroll_down_after_up(self, terminal):
         """Scrolling down after up shows different content."""
@@ -47,8 +58,8 @@ class TestScrolling:
         self._scroll_wheel(terminal, -1)  # Scroll down
         screenshot_down, _ = terminal.wait_and_screenshot("keyboard_scrolled_down")
 
-        diff = ScreenAnalyzer().compare_screenshots(screenshot_up, screenshot_down)
-        assert diff > 5000, "Screen did not change after scroll down"
+        assert ScreenAnalyzer().frames_differ(screenshot_up, screenshot_down, 25, step=4), \
+            "Screen did not change after scroll down"
 
 
 class TestBasicKeys:
@@ -87,7 +98,7 @@ class TestNavigation:
 
         win32api.keybd_event(win32con.VK_UP, 0, 0, 0)
         win32api.keybd_event(win32con.VK_UP, 0, win32con.KEYEVENTF_KEYUP, 0)
-        time.sleep(0.3)
+        terminal.wait_until_settled(0.3)
 
         terminal.assert_renders("keyboard_arrow_up")
 
@@ -98,7 +109,7 @@ class TestNavigation:
 
         win32api.keybd_event(win32con.VK_TAB, 0, 0, 0)
         win32api.keybd_event(win32con.VK_TAB, 0, win32con.KEYEVENTF_KEYUP, 0)
-        time.sleep(0.5)
+        terminal.wait_until_settled(0.5)
 
         # Cancel and continue
         win32api.keybd_event(win32con.VK_ESCAPE, 0, 0, 0)
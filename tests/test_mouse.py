@@ -10,6 +10,9 @@ import time
 import win32api
 import win32con
 
+# Clipboard, cursor and keybd_event input are desktop-global
+pytestmark = pytest.mark.serial
+
 
 def click(terminal, offset_x: int = 0, offset_y: int = 0):
     """Click at center of terminal, with optional offset."""
@@ -30,7 +33,7 @@ def scroll_wheel(terminal, direction: int, count: int = 10):
     for _ in range(count):
         win32api.mouse_event(win32con.MOUSEEVENTF_WHEEL, 0, 0, direction * 120, 0)
         time.sleep(0.1)
-    time.sleep(0.5)
+    terminal.wait_until_settled(0.5)
 
 
 @pytest.mark.input
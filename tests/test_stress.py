@@ -29,7 +29,7 @@ class TestStress:
         """Rapidly send 100 newlines to stress scrolling."""
         for i in range(100):
             terminal.send_keys(f"L{i}\n", delay=0.005)
-        time.sleep(1)
+        terminal.wait_until_settled(1.0)
         terminal.send_command("echo SCROLL_STRESS_OK")
         terminal.assert_renders("stress_newlines", "SCROLL")
 
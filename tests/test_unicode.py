@@ -21,6 +21,12 @@ BOX_DRAWING = [
     ("\u2514\u2500\u2500\u2500\u2518", "simple_bot"),
 ]
 
+# Box lines drawn by a single multi-line Write-Host (`n is PowerShell's newline)
+SIMPLE_BOX_CMD = 'Write-Host "{}"'.format("`n".join(line for line, _ in BOX_DRAWING))
+
+# Block elements repeated to a 60-column line
+LONG_UNICODE_LINE = "\u2588\u2593\u2592\u2591" * 15
+
 # CJK test cases: (chars, name)
 CJK_CHARS = [
     ("\u4e2d\u6587\u6d4b\u8bd5", "chinese"),
@@ -51,15 +57,16 @@ class TestBoxDrawing:
 
     def test_simple_box_renders(self, terminal):
         """Simple box drawing characters render."""
-        for line, _ in BOX_DRAWING:
-            terminal.send_command(f"Write-Host '{line}'", wait=0.2)
+        terminal.send_command(SIMPLE_BOX_CMD)
         terminal.assert_renders("unicode_box")
 
     def test_double_line_box_renders(self, terminal):
         """Double-line box drawing characters render."""
-        terminal.send_command("Write-Host '\u2554\u2550\u2550\u2550\u2557'", wait=0.2)
-        terminal.send_command("Write-Host '\u2551 Y \u2551'", wait=0.2)
-        terminal.send_command("Write-Host '\u255a\u2550\u2550\u2550\u255d'")
+        terminal.send_command(
+            'Write-Host "\u2554\u2550\u2550\u2550\u2557`n'
+            '\u2551 Y \u2551`n'
+            '\u255a\u2550\u2550\u2550\u255d"'
+        )
         terminal.assert_renders("unicode_double_box")
 
     def test_block_elements_render(self, terminal):
@@ -122,6 +129,5 @@ class TestUnicodeEdgeCases:
 
     def test_long_unicode_line(self, terminal):
         """Long line with Unicode characters."""
-        pattern = "\u2588\u2593\u2592\u2591" * 15
-        terminal.send_command(f"Write-Host '{pattern}'")
+        terminal.send_command(f"Write-Host '{LONG_UNICODE_LINE}'")
         terminal.assert_renders("unicode_long_line")
@@ -17,7 +17,6 @@ Usage:
 """
 
 import pytest
-import time
 
 
 @pytest.mark.visual
@@ -26,10 +25,7 @@ class TestVisualRegression:
 
     def test_startup_screen(self, terminal, visual_regression, update_baselines):
         """Verify terminal startup screen renders correctly."""
-        # Clear and wait for stable rendering
-        terminal.send_keys("cls\n")
-        time.sleep(1.0)
-
+        # auto_clear_screen has already cleared; wait_and_screenshot waits for stable rendering
         screenshot, _ = terminal.wait_and_screenshot("visual_startup")
 
         if update_baselines:
@@ -41,14 +37,10 @@ class TestVisualRegression:
 
     def test_basic_text_rendering(self, terminal, visual_regression, update_baselines):
         """Verify basic text rendering is consistent."""
-        terminal.send_keys("cls\n")
-        time.sleep(0.5)
-
         # Output predictable text pattern
         terminal.send_keys('echo "ABCDEFGHIJKLMNOPQRSTUVWXYZ"\n')
         terminal.send_keys('echo "abcdefghijklmnopqrstuvwxyz"\n')
-        terminal.send_keys('echo "0123456789"\n')
-        time.sleep(0.5)
+        terminal.send_command('echo "0123456789"')
 
         screenshot, _ = terminal.wait_and_screenshot("visual_text")
 
@@ -61,9 +53,6 @@ class TestVisualRegression:
 
     def test_ansi_colors_rendering(self, terminal, visual_regression, update_baselines):
         """Verify ANSI color rendering is consistent."""
-        terminal.send_keys("cls\n")
-        time.sleep(0.5)
-
         # PowerShell ANSI color output
         colors_cmd = '''
 $esc = [char]27
@@ -71,10 +60,8 @@ Write-Host "${esc}[31mRED${esc}[0m ${esc}[32mGREEN${esc}[0m ${esc}[34mBLUE${esc}
 Write-Host "${esc}[33mYELLOW${esc}[0m ${esc}[35mMAGENTA${esc}[0m ${esc}[36mCYAN${esc}[0m"
 Write-Host "${esc}[1;31mBOLD RED${esc}[0m ${esc}[4;32mUNDERLINE GREEN${esc}[0m"
 '''
-        for line in colors_cmd.strip().split('\n'):
-            terminal.send_keys(line + '\n')
-            time.sleep(0.1)
-        time.sleep(0.5)
+        # Type all lines in one batch; the shell runs them in turn as it reads each Enter
+        terminal.send_command(colors_cmd.strip(), wait=0.8)
 
         screenshot, _ = terminal.wait_and_screenshot("visual_colors")
 
@@ -87,14 +74,10 @@ Write-Host "${esc}[1;31mBOLD RED${esc}[0m ${esc}[4;32mUNDERLINE GREEN${esc}[0m"
 
     def test_unicode_rendering(self, terminal, visual_regression, update_baselines):
         """Verify Unicode character rendering is consistent."""
-        terminal.send_keys("cls\n")
-        time.sleep(0.5)
-
         # Unicode test patterns
         terminal.send_keys('echo "Box: ┌─┬─┐ │ ├─┼─┤ └─┴─┘"\n')
         terminal.send_keys('echo "Arrows: ← ↑ → ↓ ↔ ↕"\n')
-        terminal.send_keys('echo "Math: ± × ÷ ≤ ≥ ≠ ∞"\n')
-        time.sleep(0.5)
+        terminal.send_command('echo "Math: ± × ÷ ≤ ≥ ≠ ∞"')
 
         screenshot, _ = terminal.wait_and_screenshot("visual_unicode")
 
@@ -107,12 +90,8 @@ Write-Host "${esc}[1;31mBOLD RED${esc}[0m ${esc}[4;32mUNDERLINE GREEN${esc}[0m"
 
     def test_cursor_rendering(self, terminal, visual_regression, update_baselines):
         """Verify cursor rendering is consistent."""
-        terminal.send_keys("cls\n")
-        time.sleep(0.5)
-
         # Position cursor with some text
-        terminal.send_keys('echo "Cursor test:"\n')
-        time.sleep(0.3)
+        terminal.send_command('echo "Cursor test:"', wait=0.3)
 
         # The cursor should be visible at the prompt
         screenshot, _ = terminal.wait_and_screenshot("visual_cursor")
@@ -127,12 +106,8 @@ Write-Host "${esc}[1;31mBOLD RED${esc}[0m ${esc}[4;32mUNDERLINE GREEN${esc}[0m"
 
     def test_scrollback_rendering(self, terminal, visual_regression, update_baselines):
         """Verify scrollback buffer rendering is consistent."""
-        terminal.send_keys("cls\n")
-        time.sleep(0.5)
-
         # Generate enough output to trigger scrolling
-        terminal.send_keys('for ($i=1; $i -le 30; $i++) { echo "Line $i" }\n')
-        time.sleep(1.0)
+        terminal.send_command('for ($i=1; $i -le 30; $i++) { echo "Line $i" }', wait=1.0)
 
         screenshot, _ = terminal.wait_and_screenshot("visual_scrollback")
 
@@ -145,9 +120,6 @@ Write-Host "${esc}[1;31mBOLD RED${esc}[0m ${esc}[4;32mUNDERLINE GREEN${esc}[0m"
 
     def test_prompt_rendering(self, terminal, visual_regression, update_baselines):
         """Verify command prompt rendering is consistent."""
-        terminal.send_keys("cls\n")
-        time.sleep(0.5)
-
         # Just show the prompt
         screenshot, _ = terminal.wait_and_screenshot("visual_prompt")
 
@@ -169,10 +141,7 @@ class TestVisualRegressionUtilities:
         import uuid
         test_name = f"test_baseline_{uuid.uuid4().hex[:8]}"
 
-        terminal.send_keys("cls\n")
-        time.sleep(0.5)
-        terminal.send_keys('echo "Baseline test"\n')
-        time.sleep(0.3)
+        terminal.send_command('echo "Baseline test"', wait=0.3)
 
         screenshot, _ = terminal.wait_and_screenshot("baseline_test")
 
@@ -184,18 +153,18 @@ class TestVisualRegressionUtilities:
         # Cleanup
         visual_regression.delete_baseline(test_name)
 
-    def test_diff_detection(self, terminal, visual_regression):
+    def test_diff_detection(self, visual_regression):
         """Test that visual differences are detected."""
         from PIL import Image
         import numpy as np
 
         # Create a baseline image
-        baseline = Image.new('RGB', (100, 100), color='black')
+        baseline = Image.fromarray(np.zeros((100, 100, 3), dtype=np.uint8))
         test_name = "test_diff_detection"
         visual_regression.update_baseline(test_name, baseline)
 
         # Create a different image (white instead of black)
-        different = Image.new('RGB', (100, 100), color='white')
+        different = Image.fromarray(np.full((100, 100, 3), 255, dtype=np.uint8))
 
         # This should fail
         result = visual_regression.compare(test_name, different, threshold=0.1)
@@ -205,22 +174,20 @@ class TestVisualRegressionUtilities:
         # Cleanup
         visual_regression.delete_baseline(test_name)
 
-    def test_threshold_sensitivity(self, terminal, visual_regression):
+    def test_threshold_sensitivity(self, visual_regression):
         """Test that threshold parameter works correctly."""
         from PIL import Image
         import numpy as np
 
         # Create baseline
-        baseline = Image.new('RGB', (100, 100), color='black')
+        pixels = np.zeros((100, 100, 3), dtype=np.uint8)
+        baseline = Image.fromarray(pixels)
         test_name = "test_threshold"
         visual_regression.update_baseline(test_name, baseline)
 
         # Create image with small difference (1% of pixels changed)
-        different = baseline.copy()
-        pixels = different.load()
-        for x in range(10):  # 10x10 = 100 pixels = 1% of 10000
-            for y in range(10):
-                pixels[x, y] = (255, 255, 255)
+        pixels[:10, :10] = 255  # 10x10 = 100 pixels = 1% of 10000
+        different = Image.fromarray(pixels)
 
         # Should fail with 0.1% threshold
         result = visual_regression.compare(test_name, different, threshold=0.1)
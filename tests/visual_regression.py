@@ -6,16 +6,20 @@ Provides infrastructure for comparing screenshots against baselines
 to detect unintended visual changes in terminal rendering.
 """
 
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, Set
+from collections import OrderedDict
 from pathlib import Path
-from PIL import Image, ImageChops, ImageDraw, ImageFilter
+from PIL import Image, ImageChops, ImageFilter
 import numpy as np
+import atexit
 import hashlib
 import json
 import time
 import os
+import warnings
 
 from config import TestConfig
+from image_utils import image_digest
 
 __all__ = [
     'VisualRegressionTester',
@@ -67,6 +71,15 @@ class VisualRegressionTester:
     Compares screenshots against stored baselines to detect visual changes.
     """
 
+    # Parsed metadata.json per resolved path, shared by all instances
+    _METADATA_CACHE: Dict[Path, Dict[str, Any]] = {}
+    # Names changed (added, updated or deleted) per metadata file, not yet flushed
+    _DIRTY_METADATA: Dict[Path, Set[str]] = {}
+    # Whether the interpreter-exit flush of all dirty metadata is registered
+    _ATEXIT_REGISTERED = False
+    # Decoded, preprocessed baselines kept per tester (LRU)
+    _BASELINE_CACHE_SIZE = 16
+
     def __init__(
         self,
         baselines_dir: Optional[Path] = None,
@@ -98,21 +111,75 @@ class VisualRegressionTester:
         # Metadata file for baseline info
         self.metadata_file = self.baselines_dir / "metadata.json"
         self._metadata = self._load_metadata()
+        if not VisualRegressionTester._ATEXIT_REGISTERED:
+            atexit.register(VisualRegressionTester._flush_all_metadata)
+            VisualRegressionTester._ATEXIT_REGISTERED = True
 
-    def _load_metadata(self) -> Dict[str, Any]:
-        """Load baseline metadata."""
-        if self.metadata_file.exists():
+        # (path, mtime, blur_radius) -> (preprocessed baseline, digest of its decoded RGB pixels)
+        self._baseline_cache: "OrderedDict[Tuple[Path, int, int], Tuple[Image.Image, bytes]]" = OrderedDict()
+
+        # ((name, baseline mtime, actual digest, blur_radius, ignore_antialiasing),
+        #  (diff mask, baseline)) of the last compare
+        self._last_diff: Optional[Tuple[Tuple[str, int, bytes, int, bool], Tuple[np.ndarray, Image.Image]]] = None
+
+    @staticmethod
+    def _read_metadata(metadata_file: Path) -> Dict[str, Any]:
+        """Parse a metadata file ({} if it is missing or unreadable)."""
+        if metadata_file.exists():
             try:
-                with open(self.metadata_file, 'r') as f:
+                with open(metadata_file, 'r') as f:
                     return json.load(f)
             except (json.JSONDecodeError, IOError):
                 return {}
         return {}
 
-    def _save_metadata(self) -> None:
-        """Save baseline metadata."""
-        with open(self.metadata_file, 'w') as f:
-            json.dump(self._metadata, f, indent=2)
+    def _load_metadata(self) -> Dict[str, Any]:
+        """Load baseline metadata (parsed once per file and shared between instances)."""
+        key = self.metadata_file.resolve()
+        cached = self._METADATA_CACHE.get(key)
+        if cached is None:
+            cached = self._METADATA_CACHE[key] = self._read_metadata(self.metadata_file)
+        return cached
+
+    def _save_metadata(self, name: str) -> None:
+        """Mark a baseline's metadata as changed; flush_metadata() writes it."""
+        self._DIRTY_METADATA.setdefault(self.metadata_file.resolve(), set()).add(name)
+
+    def flush_metadata(self) -> None:
+        """Write baseline metadata if it changed since the last flush."""
+        self._flush_metadata_file(self.metadata_file.resolve())
+
+    @classmethod
+    def _flush_metadata_file(cls, metadata_file: Path) -> None:
+        """
+        Merge this process's changed entries into a metadata file.
+
+        The file is re-read first, so entries written meanwhile by other
+        processes (e.g. other xdist workers) are kept.
+        """
+        names = cls._DIRTY_METADATA.pop(metadata_file, None)
+        if not names:
+            return
+        cached = cls._METADATA_CACHE.get(metadata_file, {})
+        metadata = cls._read_metadata(metadata_file)
+        for name in names:
+            if name in cached:
+                metadata[name] = cached[name]
+            else:
+                metadata.pop(name, None)
+
+        # Write a per-process temp file and rename it over the original, so
+        # an interrupted run never leaves a truncated metadata.json behind
+        tmp_file = metadata_file.with_name(f"{metadata_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(tmp_file, metadata_file)
+
+    @classmethod
+    def _flush_all_metadata(cls) -> None:
+        """Flush every metadata file with unwritten changes (run at interpreter exit)."""
+        for metadata_file in list(cls._DIRTY_METADATA):
+            cls._flush_metadata_file(metadata_file)
 
     def _get_baseline_path(self, name: str) -> Path:
         """Get path for a baseline image."""
@@ -132,10 +199,9 @@ class VisualRegressionTester:
         """Compute perceptual hash of an image."""
         # Resize to small size for hashing
         img = image.convert('L').resize((16, 16), Image.Resampling.LANCZOS)
-        pixels = list(img.getdata())
-        avg = sum(pixels) / len(pixels)
-        bits = ''.join('1' if p > avg else '0' for p in pixels)
-        return hashlib.md5(bits.encode()).hexdigest()[:16]
+        pixels = np.asarray(img)
+        bits = np.packbits(pixels > pixels.mean())
+        return hashlib.blake2b(bits.tobytes(), digest_size=8).hexdigest()
 
     def _preprocess_image(self, image: Image.Image) -> Image.Image:
         """Preprocess image for comparison."""
@@ -149,64 +215,121 @@ class VisualRegressionTester:
 
         return image
 
-    def _compute_diff(
+    def _load_baseline(self, path: Path, mtime_ns: int) -> Tuple[Image.Image, bytes]:
+        """
+        Decode and preprocess a baseline, reusing it while the file is unchanged.
+
+        Returns:
+            Tuple of (preprocessed baseline, image_digest of the unblurred RGB baseline)
+
+        Raises:
+            IOError: If the baseline cannot be read or decoded
+        """
+        key = (path, mtime_ns, self.blur_radius)
+        cached = self._baseline_cache.get(key)
+        if cached is not None:
+            self._baseline_cache.move_to_end(key)
+            return cached
+
+        # Decode here so a corrupt PNG is reported by the caller (and the
+        # file handle is released)
+        baseline = Image.open(path)
+        baseline.load()
+        if baseline.mode != 'RGB':
+            baseline = baseline.convert('RGB')
+        cached = (self._preprocess_image(baseline), image_digest(baseline))
+        self._baseline_cache[key] = cached
+        if len(self._baseline_cache) > self._BASELINE_CACHE_SIZE:
+            self._baseline_cache.popitem(last=False)
+        return cached
+
+    def _compute_mask(
         self,
         baseline: Image.Image,
         actual: Image.Image
-    ) -> Tuple[Image.Image, int, int]:
+    ) -> Tuple[np.ndarray, Image.Image]:
         """
-        Compute difference between two images.
+        Find the pixels that differ between two images.
+
+        The baseline must already be preprocessed (see _preprocess_image).
 
         Returns:
-            Tuple of (diff_image, diff_pixels, total_pixels)
+            Tuple of (boolean diff mask, preprocessed baseline)
         """
         # Ensure same size
         if baseline.size != actual.size:
-            # Resize actual to match baseline
-            actual = actual.resize(baseline.size, Image.Resampling.LANCZOS)
+            # Resize actual to match baseline; BILINEAR is plenty for a diff
+            # between near-identical resolutions
+            warnings.warn(
+                f"Screenshot size {actual.size} differs from baseline {baseline.size}; "
+                "resizing before comparison",
+                stacklevel=3
+            )
+            actual = actual.resize(baseline.size, Image.Resampling.BILINEAR)
 
         # Preprocess
-        baseline = self._preprocess_image(baseline)
         actual = self._preprocess_image(actual)
 
         # Compute difference
         diff = ImageChops.difference(baseline, actual)
 
+        # Cheap pre-check in C: only the bounding box of non-zero differences
+        # needs the per-pixel analysis (nothing at all for identical images)
+        diff_mask = np.zeros(baseline.size[::-1], dtype=bool)
+        bbox = diff.getbbox()
+        if bbox is None:
+            return diff_mask, baseline
+        if self.ignore_antialiasing:
+            # Per-band maxima (also computed in C) bound every pixel's squared
+            # distance; if even that bound is within tolerance, nothing differs
+            bound = sum(high * high for _, high in diff.getextrema())
+            if bound <= 25 * 25:
+                return diff_mask, baseline
+        left, top, right, bottom = bbox
+
         # Convert to numpy for analysis
-        diff_array = np.array(diff)
-        baseline_array = np.array(baseline)
-        actual_array = np.array(actual)
+        diff_array = np.asarray(diff.crop(bbox))
 
         # Calculate per-pixel difference magnitude
         if self.ignore_antialiasing:
-            # Use threshold to ignore minor differences (anti-aliasing)
-            pixel_diff = np.sqrt(np.sum((baseline_array.astype(float) - actual_array.astype(float)) ** 2, axis=2))
-            diff_mask = pixel_diff > 25  # Tolerance for anti-aliasing
+            # Use threshold to ignore minor differences (anti-aliasing).
+            # Squared distance from the uint8 abs-diff fits in uint32, so no
+            # float conversion or square root is needed; einsum squares and
+            # sums the channels in one pass without an HxWx3 temporary.
+            channels = diff_array.astype(np.uint16)
+            pixel_diff = np.einsum('ijk,ijk->ij', channels, channels, dtype=np.uint32)
+            region_mask = pixel_diff > 25 * 25  # Tolerance for anti-aliasing
         else:
-            diff_mask = np.any(diff_array > 0, axis=2)
-
-        diff_pixels = int(np.sum(diff_mask))
-        total_pixels = baseline.size[0] * baseline.size[1]
+            # OR the uint8 channels together rather than building an HxWx3 bool array
+            region_mask = (diff_array[:, :, 0] | diff_array[:, :, 1] | diff_array[:, :, 2]) != 0
 
-        # Create visual diff image
-        diff_visual = Image.new('RGB', baseline.size)
-        diff_draw = ImageDraw.Draw(diff_visual)
+        diff_mask[top:bottom, left:right] = region_mask
+        return diff_mask, baseline
 
-        # Composite: baseline faded + red highlight on differences
-        faded_baseline = Image.blend(
-            baseline,
-            Image.new('RGB', baseline.size, (128, 128, 128)),
-            0.5
-        )
-        diff_visual = faded_baseline.copy()
+    def _render_diff(self, baseline: Image.Image, diff_mask: np.ndarray) -> Image.Image:
+        """Draw the baseline faded with differing pixels highlighted in red."""
+        # Integer form of blending the baseline 50/50 with grey (128) and then
+        # 50/50 with a black image that is red (255) on differences
+        composite = np.asarray(baseline) >> 2
+        composite += 32
+        composite[diff_mask] += np.array([127, 0, 0], dtype=np.uint8)
+        return Image.fromarray(composite)
 
-        # Highlight differences in red
-        diff_highlight = np.zeros((*baseline.size[::-1], 3), dtype=np.uint8)
-        diff_highlight[diff_mask] = [255, 0, 0]
-        diff_overlay = Image.fromarray(diff_highlight)
-        diff_visual = Image.blend(diff_visual, diff_overlay, 0.5)
+    def _compute_diff(
+        self,
+        baseline: Image.Image,
+        actual: Image.Image
+    ) -> Tuple[Image.Image, int, int]:
+        """
+        Compute difference between two images.
 
-        return diff_visual, diff_pixels, total_pixels
+        Returns:
+            Tuple of (diff_image, diff_pixels, total_pixels)
+        """
+        diff_mask, baseline = self._compute_mask(self._preprocess_image(baseline), actual)
+        diff_pixels = int(np.count_nonzero(diff_mask))
+        total_pixels = diff_mask.size
+        return self._render_diff(baseline, diff_mask), diff_pixels, total_pixels
 
     def compare(
         self,
@@ -237,7 +360,7 @@ class VisualRegressionTester:
                 'hash': self._compute_hash(actual),
                 'size': actual.size
             }
-            self._save_metadata()
+            self._save_metadata(name)
 
             return VisualRegressionResult(
                 passed=True,
@@ -248,20 +371,36 @@ class VisualRegressionTester:
                 message=f"New baseline created: {baseline_path}"
             )
 
-        # Load baseline
-        try:
-            baseline = Image.open(baseline_path)
-        except IOError as e:
-            return VisualRegressionResult(
-                passed=False,
-                diff_percentage=100.0,
-                diff_pixels=0,
-                total_pixels=0,
-                message=f"Failed to load baseline: {e}"
-            )
-
-        # Compute difference
-        diff_image, diff_pixels, total_pixels = self._compute_diff(baseline, actual)
+        # Comparing the same screenshot again (e.g. at another threshold)
+        # reuses the previous mask instead of reloading and re-diffing
+        mtime_ns = baseline_path.stat().st_mtime_ns
+        actual_digest = image_digest(actual)
+        # The mask also depends on the (mutable) preprocessing settings
+        key = (name, mtime_ns, actual_digest, self.blur_radius, self.ignore_antialiasing)
+        if self._last_diff is not None and self._last_diff[0] == key:
+            diff_mask, baseline = self._last_diff[1]
+        else:
+            # Load baseline (decoded once while the file is unchanged)
+            try:
+                baseline, baseline_digest = self._load_baseline(baseline_path, mtime_ns)
+            except IOError as e:
+                return VisualRegressionResult(
+                    passed=False,
+                    diff_percentage=100.0,
+                    diff_pixels=0,
+                    total_pixels=0,
+                    message=f"Failed to load baseline: {e}"
+                )
+
+            # Pixel-identical screenshots (the usual pass) need no diff at all
+            if actual_digest == baseline_digest:
+                diff_mask = np.zeros(baseline.size[::-1], dtype=bool)
+            else:
+                diff_mask, baseline = self._compute_mask(baseline, actual)
+            self._last_diff = (key, (diff_mask, baseline))
+
+        diff_pixels = int(np.count_nonzero(diff_mask))
+        total_pixels = diff_mask.size
         diff_percentage = (diff_pixels / total_pixels) * 100 if total_pixels > 0 else 0
 
         passed = diff_percentage <= threshold
@@ -274,7 +413,7 @@ class VisualRegressionTester:
             actual_path = self._get_actual_path(name)
             diff_path = self._get_diff_path(name)
             actual.save(actual_path)
-            diff_image.save(diff_path)
+            self._render_diff(baseline, diff_mask).save(diff_path)
 
         message = f"Diff: {diff_percentage:.2f}% ({diff_pixels}/{total_pixels} pixels)"
         if not passed:
@@ -314,7 +453,7 @@ class VisualRegressionTester:
             'hash': self._compute_hash(image),
             'size': image.size
         }
-        self._save_metadata()
+        self._save_metadata(name)
 
         return baseline_path
 
@@ -333,7 +472,7 @@ class VisualRegressionTester:
             baseline_path.unlink()
             if name in self._metadata:
                 del self._metadata[name]
-                self._save_metadata()
+                self._save_metadata(name)
             return True
         return False
 
@@ -366,9 +505,12 @@ class VisualRegressionTester:
         deleted = 0
         cutoff = time.time() - (max_age_hours * 3600)
 
-        for path in self.diffs_dir.glob("*.png"):
-            if path.stat().st_mtime < cutoff:
-                path.unlink()
-                deleted += 1
+        # scandir entries carry their stat result, so this is one call per file
+        with os.scandir(self.diffs_dir) as entries:
+            for entry in entries:
+                if (entry.name.lower().endswith(".png") and entry.is_file()
+                        and entry.stat().st_mtime < cutoff):
+                    os.unlink(entry.path)
+                    deleted += 1
 
         return deleted